@@ -1,17 +1,25 @@
 ﻿from flask import Flask
-from config import Config
-from extensions import db, migrate, login_manager
-from models import User
+import os
+from config import Config, ProductionConfig
+from extensions import db, migrate, login_manager, cache, query_stats, user_cache, engine_tuning, replica
+from commands import register_commands
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(ProductionConfig if os.getenv("APP_ENV") == "production" else Config)
+    if config:
+        app.config.update(config)
 
+    engine_tuning.init_app(app)   # pool options must be in place before db.init_app creates the engines
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "warning"
+    cache.init_app(app)
+    query_stats.init_app(app)
+    user_cache.init_app(app)
+    replica.init_app(app)
 
     from blueprints.public import bp as public_bp
     from blueprints.staff import bp as staff_bp
@@ -29,9 +37,11 @@ def create_app():
     app.register_blueprint(user_bp, url_prefix="/user")
     app.register_blueprint(lead_bp, url_prefix="/lead")  # ← IMPORTANT
 
+    register_commands(app)
+
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load(int(user_id))
 
     return app
 
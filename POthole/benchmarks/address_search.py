@@ -0,0 +1,32 @@
+"""Admin address filter: indexed search (services.search) vs. the old ILIKE scan.
+
+    python -m benchmarks.address_search [sizes...]     (default: 10000 100000 1000000)
+"""
+import sys
+from benchmarks.common import bench_app, insert_potholes, timed
+
+TERMS = ["Road #17, Lake", "Bashundhara", "House #123, Road #4", "Ferry Bypass"]
+
+def main(sizes):
+    from models import Pothole
+    from services.search import filter_potholes, search_potholes
+    print(f"{'potholes':>10} {'term':<22} {'ILIKE ms':>9} {'index ms':>9} {'ranked ms':>10} {'matches':>8}")
+    for n in sizes:
+        app = bench_app(f"search_{n}")
+        with app.app_context():
+            insert_potholes(n)
+            for term in TERMS:
+                newest = Pothole.query.order_by(Pothole.created_at.desc(), Pothole.id.desc())
+                def ilike():
+                    return newest.filter(Pothole.street_address.ilike(f"%{term}%")).limit(50).all()
+                def indexed():
+                    return filter_potholes(newest, term).limit(50).all()
+                old_ms, _, old = timed(ilike, 5)
+                new_ms, _, new = timed(indexed, 5)
+                rank_ms, _, _ = timed(lambda: search_potholes(term, limit=50), 5)
+                assert [p.id for p in old] == [p.id for p in new], term
+                matches = filter_potholes(Pothole.query, term).count()
+                print(f"{n:>10} {term:<22} {old_ms:>9.2f} {new_ms:>9.2f} {rank_ms:>10.2f} {matches:>8}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,77 @@
+"""What authentication costs per request, with and without the user cache.
+
+    python -m benchmarks.auth_overhead [--users N] [--requests N]
+
+Seeds one throwaway database, then for each setting runs a fresh app on it
+and times (a) authenticated GETs through the test client, reporting latency
+and the queries each request issued, and (b) the login lookup by email, with
+the lower(email)/lower(name) indexes dropped ("before") and in place.
+"""
+import argparse, logging, statistics, time
+from benchmarks.common import bench_app
+from benchmarks.datagen import PASSWORD, generate
+
+ROUTES = [("staff.dashboard", "staff", "/staff/"), ("lead.dashboard", "lead", "/lead/"),
+          ("admin.potholes", "admin", "/admin/potholes"), ("user.dashboard", "citizen", "/user/dashboard")]
+
+def _pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=200_000)
+    ap.add_argument("--requests", type=int, default=300, help="requests per route and setting")
+    args = ap.parse_args()
+
+    app = bench_app(f"auth_{args.users}", TESTING=True)
+    from extensions import db, query_stats
+    from models import User
+    with app.app_context():
+        summary = generate(max(args.users // 10, 1000), args.users)
+        emails = [r[0].upper() for r in db.session.execute(
+            db.select(User.email).order_by(db.func.random()).limit(args.requests))]
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+
+    print(f"{'route':<18} {'user cache':<11} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for size in (0, 10_000):
+        app = bench_app("auth", TESTING=True, SQLALCHEMY_DATABASE_URI=uri, USER_CACHE_SIZE=size)
+        app.logger.setLevel(logging.ERROR)
+        clients = {}
+        for role in ("admin", "lead", "staff", "citizen"):
+            clients[role] = app.test_client()
+            r = clients[role].post("/auth/login", data={"email": summary["logins"][role], "password": PASSWORD})
+            assert r.status_code == 302, f"login {role}: {r.status_code}"
+        for name, role, url in ROUTES:
+            latencies, queries = [], []
+            for _ in range(args.requests):
+                with query_stats.collect() as log:
+                    t = time.perf_counter()
+                    r = clients[role].get(url)
+                    latencies.append((time.perf_counter() - t) * 1000)
+                assert r.status_code == 200, f"{name}: {r.status_code}"
+                queries.append(log.count)
+            print(f"{name:<18} {'on' if size else 'off':<11} {_pct(latencies, 0.5):>8.2f} "
+                  f"{_pct(latencies, 0.99):>8.2f} {statistics.fmean(queries):>8.1f}")
+
+    def lookup_ms():
+        q = User.query.filter(db.or_(db.func.lower(User.email) == db.bindparam("ident"),
+                                     db.func.lower(User.name) == db.bindparam("ident")))
+        t = time.perf_counter()
+        for e in emails:
+            q.params(ident=e.lower()).first()
+        return (time.perf_counter() - t) * 1000 / len(emails)
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_user_email_lower")
+            conn.exec_driver_sql("DROP INDEX ix_user_name_lower")
+        before = lookup_ms()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE INDEX ix_user_email_lower ON user (lower(email))")
+            conn.exec_driver_sql("CREATE INDEX ix_user_name_lower ON user (lower(name))")
+        after = lookup_ms()
+    print(f"\nlogin lookup over {args.users} users: {before:.2f} ms without the lower() indexes, {after:.3f} ms with")
+
+if __name__ == "__main__":
+    main()
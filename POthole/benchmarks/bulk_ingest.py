@@ -0,0 +1,36 @@
+"""Rows/sec: POST /api/potholes one at a time vs. POST /api/potholes/bulk.
+
+    python -m benchmarks.bulk_ingest [rows]     (default: 5000)
+"""
+import json, random, sys, time
+from benchmarks.common import bench_app, random_address, random_points
+
+def _rows(n, seed):
+    rng = random.Random(seed)
+    return [{"street_address": random_address(rng), "size_1_10": rng.randint(1, 10),
+             "latitude": lat, "longitude": lon} for lat, lon in random_points(n, rng)]
+
+def main(n):
+    print(f"{'path':<24} {'rows':>7} {'seconds':>8} {'rows/sec':>9}")
+    app = bench_app("ingest_single")
+    client = app.test_client()
+    rows = _rows(n, 1)
+    t = time.perf_counter()
+    for row in rows:
+        assert client.post("/api/potholes", json=row).status_code == 200
+    single = time.perf_counter() - t
+    print(f"{'single-row endpoint':<24} {n:>7} {single:>8.2f} {n / single:>9.0f}")
+
+    for label, kwargs in [("bulk (JSON array)", lambda rs: {"json": rs}),
+                          ("bulk (NDJSON)", lambda rs: {"data": "\n".join(map(json.dumps, rs)),
+                                                        "content_type": "application/x-ndjson"})]:
+        app = bench_app("ingest_bulk")
+        client = app.test_client()
+        t = time.perf_counter()
+        out = client.post("/api/potholes/bulk", **kwargs(rows)).get_json()
+        took = time.perf_counter() - t
+        assert out["created"] + out["duplicate"] == n, out
+        print(f"{label:<24} {n:>7} {took:>8.2f} {n / took:>9.0f}   ({out['duplicate']} duplicates)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
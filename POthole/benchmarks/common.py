@@ -0,0 +1,68 @@
+"""Shared helpers for the scripts in this folder.
+
+Run benchmarks from the POthole directory, e.g. ``python -m benchmarks.spatial_lookup``.
+Each one works against a throwaway SQLite file, never the real database.
+"""
+import atexit, os, random, shutil, statistics, tempfile, time
+from datetime import datetime, timedelta
+
+# city centre the synthetic data clusters around (Dhaka)
+CENTER = (23.8103, 90.4125)
+
+def bench_app(name, **overrides):
+    tmp = tempfile.mkdtemp(prefix="phtrs-bench-")
+    atexit.register(shutil.rmtree, tmp, ignore_errors=True)
+    from app import create_app
+    from extensions import db
+    config = dict(SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(tmp, f"{name}.db"),
+                  UPLOAD_FOLDER=os.path.join(tmp, "uploads"))
+    config.update(overrides)
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+    return app
+
+_STREET_A = ["Lake", "Mosque", "Station", "College", "Market", "Bridge", "Garden", "Temple", "Mill", "Park",
+             "River", "Hill", "Airport", "Court", "Hospital", "Bazar", "School", "Canal", "Ferry", "Field"]
+_STREET_B = ["Road", "Street", "Lane", "Avenue", "Sarani", "Link Road", "Bypass", "Circle"]
+_AREAS = ["Banani", "Gulshan", "Dhanmondi", "Mirpur", "Uttara", "Mohakhali", "Motijheel", "Badda",
+          "Tejgaon", "Farmgate", "Rampura", "Khilgaon", "Mohammadpur", "Bashundhara", "Shyamoli"]
+
+def random_address(rng):
+    return (f"House #{rng.randint(1, 300)}, Road #{rng.randint(1, 120)}, "
+            f"{rng.choice(_STREET_A)} {rng.choice(_STREET_B)}, {rng.choice(_AREAS)}, Dhaka")
+
+def random_points(n, rng=None, spread_deg=0.15):
+    rng = rng or random.Random(42)
+    return [(CENTER[0] + rng.uniform(-spread_deg, spread_deg),
+             CENTER[1] + rng.uniform(-spread_deg, spread_deg)) for _ in range(n)]
+
+def insert_potholes(n, rng=None, chunk=20000):
+    """Bulk-insert n potholes scattered around CENTER; returns their (lat, lon)."""
+    from extensions import db
+    from models import Pothole
+    from services.geo import grid_cell, normalize_address
+    from services.rules import compute_priority
+    rng = rng or random.Random(42)
+    pts = random_points(n, rng)
+    t0 = datetime.utcnow() - timedelta(days=365)
+    for i in range(0, n, chunk):
+        rows = []
+        for j, (lat, lon) in enumerate(pts[i:i + chunk], start=i):
+            size = rng.randint(1, 10)
+            addr = random_address(rng)
+            rows.append(dict(public_id=f"{j:08X}", street_address=addr,
+                             address_norm=normalize_address(addr), latitude=lat, longitude=lon,
+                             grid_cell=grid_cell(lat, lon), size_1_10=size, priority=compute_priority(size),
+                             status="reported", created_at=t0 + timedelta(seconds=j * 30)))
+        db.session.execute(db.insert(Pothole), rows)
+        db.session.commit()
+    return pts
+
+def timed(fn, repeat):
+    """Run fn() repeat times; returns (mean_ms, p99_ms, last_result)."""
+    samples, out = [], None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return statistics.fmean(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))], out
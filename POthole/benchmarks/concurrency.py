@@ -0,0 +1,91 @@
+"""Parallel report submissions against SQLite, plain vs the production profile.
+
+    python -m benchmarks.concurrency [--workers N] [--reports N] [--potholes N]
+
+For each profile, seeds its own database with benchmarks.datagen. It then
+forks --workers processes, like gunicorn workers sharing one database file.
+Each process logs in as a different citizen and POSTs --reports reports to
+/report as fast as it can. The report gives throughput, latency and the
+requests that failed (e.g. "database is locked").
+
+"plain" is SQLAlchemy's and SQLite's defaults (what Config uses): rollback
+journal, synchronous=FULL. "production" is the DB_POOL and SQLITE_PRAGMAS of
+config.ProductionConfig.
+"""
+import argparse, logging, multiprocessing, random, time
+from benchmarks.common import CENTER, bench_app, random_address
+from benchmarks.datagen import PASSWORD, generate
+from config import ProductionConfig
+
+PROFILES = {"plain": {},
+            "production": dict(DB_POOL=ProductionConfig.DB_POOL, SQLITE_PRAGMAS=ProductionConfig.SQLITE_PRAGMAS)}
+
+def _pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else float("nan")
+
+def _worker(config, email, n, seed, start, out):
+    from app import create_app
+    app = create_app(config)
+    app.logger.setLevel(logging.ERROR)
+    client = app.test_client()
+    assert client.post("/auth/login", data={"email": email, "password": PASSWORD}).status_code == 302
+    rng = random.Random(seed)
+    start.wait()
+    latencies, errors = [], {}
+    for _ in range(n):
+        data = {"street_address": random_address(rng), "size_1_10": str(rng.randint(1, 10)),
+                "latitude": str(CENTER[0] + rng.uniform(-0.15, 0.15)),
+                "longitude": str(CENTER[1] + rng.uniform(-0.15, 0.15))}
+        t = time.perf_counter()
+        try:
+            r = client.post("/report", data=data)
+            failed = None if r.status_code == 302 else f"HTTP {r.status_code}"
+        except Exception as e:                 # TESTING propagates errors, e.g. OperationalError
+            failed = str(e).splitlines()[0][:80]
+        if failed:
+            errors[failed] = errors.get(failed, 0) + 1
+        else:
+            latencies.append((time.perf_counter() - t) * 1000)
+    out.put((latencies, errors))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--reports", type=int, default=100, help="reports per worker")
+    ap.add_argument("--potholes", type=int, default=50_000)
+    args = ap.parse_args()
+    ctx = multiprocessing.get_context("fork")
+
+    print(f"{args.workers} workers x {args.reports} reports on {args.potholes} potholes\n"
+          f"{'profile':<12} {'reports/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for name, overrides in PROFILES.items():
+        app = bench_app(f"concurrency_{name}", TESTING=True, **overrides)
+        from extensions import db
+        with app.app_context():
+            generate(args.potholes, max(args.potholes // 10, args.workers))
+            db.engine.dispose()                # no connections shared across the fork
+        config = dict(TESTING=True, SQLALCHEMY_DATABASE_URI=app.config["SQLALCHEMY_DATABASE_URI"],
+                      UPLOAD_FOLDER=app.config["UPLOAD_FOLDER"], **overrides)
+        start, out = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(config, f"user{i}@example.org", args.reports, i, start, out))
+                 for i in range(args.workers)]
+        for p in procs: p.start()
+        time.sleep(2)                          # let every worker build its app and log in
+        t = time.perf_counter()
+        start.set()
+        results = [out.get() for _ in procs]
+        elapsed = time.perf_counter() - t
+        for p in procs: p.join()
+        latencies = [ms for lat, _ in results for ms in lat]
+        errors = {}
+        for _, errs in results:
+            for k, v in errs.items():
+                errors[k] = errors.get(k, 0) + v
+        print(f"{name:<12} {len(latencies) / elapsed:>10.1f} {_pct(latencies, 0.5):>8.1f} "
+              f"{_pct(latencies, 0.99):>8.1f} {sum(errors.values()):>7}")
+        for msg, count in errors.items():
+            print(f"{'':<12} {count} x {msg}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Synthetic data at realistic volume, written with bulk inserts.
+
+    python -m benchmarks.datagen [--potholes N] [--users N] [--seed N]
+
+Fills the database the app is configured for (DATABASE_URL) and expects its
+tables to be empty. Benchmarks call ``generate()`` on their own throwaway
+database instead.
+
+What you get:
+  * citizens, plus an admin and a lead and a few staff per crew, all with
+    password PASSWORD;
+  * potholes clustered around hot spots across the city (a few percent
+    without coordinates), spread over the last two years;
+  * one unique report per pothole plus occasional duplicate reports, some
+    citizens reporting far more than others, and photo rows for the reports;
+  * a work order for every pothole that is in progress or repaired;
+  * a reward credit in the wallet ledger for every unique report, with
+    user.wallet_balance_cached seeded from the ledger.
+"""
+import argparse, time
+from datetime import datetime, timedelta
+import numpy as np
+from benchmarks.common import CENTER, random_address
+
+PASSWORD = "password1"
+REWARD = 20.0
+_DISTRICTS = ["Gulshan", "Banani", "Dhanmondi", "Mirpur", "Uttara", "Motijheel", "Tejgaon",
+              "Mohammadpur", "Badda", "Khilgaon"]
+
+def _insert(model, rows):
+    from extensions import db
+    if rows:
+        db.session.execute(db.insert(model), rows)
+
+def generate(potholes=1_000_000, users=100_000, seed=42, chunk=20_000, verbose=False):
+    """Populate empty tables; returns a summary including a login per role."""
+    import random
+    from extensions import db
+    from models import (User, District, Crew, CrewMembership, Pothole, PotholeReport, Photo,
+                        WorkOrder, WalletTransaction)
+    from services.geo import grid_cell, normalize_address
+    from services.rules import compute_priority
+
+    t_start = time.perf_counter()
+    say = print if verbose else (lambda *a: None)
+    rng = np.random.default_rng(seed)
+    prng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    t0 = now - timedelta(days=730)
+
+    # --- districts, crews, staff ---
+    db.session.add_all([District(name=name, code=name[:3].upper() + str(i)) for i, name in enumerate(_DISTRICTS)])
+    admin = User(name="admin", email="admin@example.org", role="admin")
+    admin.set_password(PASSWORD)
+    pw_hash = admin.password_hash
+    db.session.add(admin)
+    db.session.flush()
+    n_crews = max(10, potholes // 20_000)
+    crews, members = [], []
+    for c in range(n_crews):
+        lead = User(name=f"lead{c}", email=f"lead{c}@example.org", role="lead", password_hash=pw_hash)
+        staff = [User(name=f"staff{c}_{k}", email=f"staff{c}_{k}@example.org", role="staff",
+                      password_hash=pw_hash) for k in range(3)]
+        db.session.add_all([lead, *staff])
+        db.session.flush()
+        crew = Crew(name=f"Crew {c + 1}", crew_number=f"C-{c + 1:03d}", people_count=len(staff) + 1,
+                    lead_user_id=lead.id)
+        db.session.add(crew)
+        db.session.flush()
+        crews.append(crew.id)
+        members += [dict(crew_id=crew.id, user_id=u.id) for u in staff]
+    _insert(CrewMembership, members)
+    district_ids = [d.id for d in District.query.all()]
+    db.session.commit()
+
+    # --- citizens ---
+    uid0 = (db.session.scalar(db.select(db.func.max(User.id))) or 0) + 1
+    for i in range(0, users, chunk):
+        _insert(User, [dict(id=uid0 + j, name=f"user{j}", email=f"user{j}@example.org", role="citizen",
+                            password_hash=pw_hash, created_at=t0) for j in range(i, min(i + chunk, users))])
+    db.session.commit()
+    say(f"users: {users} citizens, {n_crews} crews")
+
+    # --- potholes: clustered coordinates ---
+    n_hot = max(20, potholes // 2_000)
+    hot = np.column_stack([CENTER[0] + rng.uniform(-0.15, 0.15, n_hot), CENTER[1] + rng.uniform(-0.15, 0.15, n_hot)])
+    weight = rng.pareto(1.2, n_hot) + 1
+    which = rng.choice(n_hot, potholes, p=weight / weight.sum())
+    coords = hot[which] + rng.normal(0, 0.002, (potholes, 2))        # ~200 m around each hot spot
+    no_coords = rng.random(potholes) < 0.03
+    sizes = rng.integers(1, 11, potholes)
+    status = rng.choice(np.array(["reported", "in_progress", "repaired"]), potholes, p=[0.5, 0.2, 0.3])
+    created = np.sort(rng.uniform(0, 730 * 86400 - 3600, potholes))
+    pid0 = (db.session.scalar(db.select(db.func.max(Pothole.id))) or 0) + 1
+    for i in range(0, potholes, chunk):
+        rows = []
+        for j in range(i, min(i + chunk, potholes)):
+            addr = random_address(prng)
+            lat, lon = (None, None) if no_coords[j] else (float(coords[j, 0]), float(coords[j, 1]))
+            at = t0 + timedelta(seconds=float(created[j]))
+            rows.append(dict(id=pid0 + j, public_id=f"{pid0 + j:08X}", street_address=addr,
+                             address_norm=normalize_address(addr), latitude=lat, longitude=lon,
+                             grid_cell=grid_cell(lat, lon), size_1_10=int(sizes[j]),
+                             location_type=prng.choice(("middle", "curb", "edge")),
+                             district_id=prng.choice(district_ids), priority=compute_priority(int(sizes[j])),
+                             status=str(status[j]), created_at=at, updated_at=at))
+        _insert(Pothole, rows)
+        db.session.commit()
+    say(f"potholes: {potholes} in {n_hot} clusters")
+
+    # --- reports, photos, rewards: a few heavy reporters, a long tail ---
+    extra = rng.geometric(0.75, potholes) - 1                          # duplicate reports per pothole
+    n_reports = int(potholes + extra.sum())
+    report_pothole = np.repeat(np.arange(potholes), extra + 1)
+    is_first = np.ones(n_reports, dtype=bool)
+    is_first[1:] = report_pothole[1:] != report_pothole[:-1]
+    activity = rng.pareto(1.5, users) + 1
+    reporter = rng.choice(users, n_reports, p=activity / activity.sum()) + uid0
+    report_delay = rng.exponential(3 * 86400, n_reports) * ~is_first
+    photo_count = rng.integers(0, 3, n_reports)
+    rid0 = (db.session.scalar(db.select(db.func.max(PotholeReport.id))) or 0) + 1
+    photo_id = 0
+    for i in range(0, n_reports, chunk):
+        reports, photos, credits = [], [], []
+        for j in range(i, min(i + chunk, n_reports)):
+            p = int(report_pothole[j])
+            at = t0 + timedelta(seconds=float(created[p] + report_delay[j]))
+            uid = int(reporter[j])
+            reports.append(dict(id=rid0 + j, pothole_id=pid0 + p, reporter_id=uid, is_duplicate=not is_first[j],
+                                reward_granted=bool(is_first[j]), photo_count=int(photo_count[j]),
+                                created_at=at, updated_at=at))
+            for _ in range(int(photo_count[j])):
+                h = f"{photo_id:040x}"
+                photos.append(dict(pothole_id=pid0 + p, reporter_id=uid, filename=f"{h[:2]}/{h}.jpg",
+                                   file_hash=h, created_at=at, updated_at=at))
+                photo_id += 1
+            if is_first[j]:
+                credits.append(dict(user_id=uid, amount=REWARD, type="credit",
+                                    description="Unique pothole report reward", ref_report_id=rid0 + j,
+                                    created_at=at, updated_at=at))
+        _insert(PotholeReport, reports)
+        _insert(Photo, photos)
+        _insert(WalletTransaction, credits)
+        db.session.commit()
+    say(f"reports: {n_reports}, photos: {photo_id}")
+
+    # --- work orders for everything past "reported" ---
+    worked = np.flatnonzero(status != "reported")
+    n_orders = 0
+    for i in range(0, len(worked), chunk):
+        rows = []
+        for p in worked[i:i + chunk]:
+            start = t0 + timedelta(seconds=float(created[p]) + prng.uniform(3600, 14 * 86400))
+            done = status[p] == "repaired"
+            hours, people = round(prng.uniform(1, 8), 1), prng.randint(1, 5)
+            material, equipment = round(prng.uniform(5, 200), 2), round(prng.uniform(0, 100), 2)
+            labor = hours * max(people, 1) * 30 if done else 0
+            end = min(start + timedelta(hours=hours * 3), now) if done else None
+            rows.append(dict(pothole_id=pid0 + int(p), crew_id=prng.choice(crews),
+                             status="completed" if done else prng.choice(("planned", "in_progress")),
+                             start_at=start, end_at=end, hours_applied=hours if done else 0,
+                             people_used=people if done else 0, filler_material_kg=round(prng.uniform(5, 80), 1),
+                             material_cost=material if done else 0, equipment_cost=equipment if done else 0,
+                             labor_cost=labor, total_cost=labor + material + equipment if done else 0,
+                             created_at=start, updated_at=end or start))
+        _insert(WorkOrder, rows)
+        db.session.commit()
+        n_orders += len(rows)
+    say(f"work orders: {n_orders}")
+
+    db.session.execute(db.text("""
+        UPDATE "user" SET wallet_balance_cached = COALESCE((
+            SELECT SUM(CASE WHEN wt.type = 'credit' THEN wt.amount ELSE -wt.amount END)
+            FROM wallet_transaction wt WHERE wt.user_id = "user".id), 0)
+    """))
+    db.session.commit()
+    busiest = db.session.execute(db.select(User.email).join(PotholeReport, PotholeReport.reporter_id == User.id)
+                                 .group_by(User.id).order_by(db.func.count().desc()).limit(1)).scalar()
+    summary = dict(users=users, crews=n_crews, potholes=potholes, reports=n_reports, photos=photo_id,
+                   work_orders=n_orders, seconds=round(time.perf_counter() - t_start, 1),
+                   logins=dict(admin="admin@example.org", lead="lead0@example.org",
+                               staff="staff0_0@example.org", citizen=busiest))
+    say(f"done in {summary['seconds']}s")
+    return summary
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--potholes", type=int, default=1_000_000)
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    from app import create_app
+    from extensions import db
+    from models import Pothole
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Pothole.id).first() is not None:
+            raise SystemExit(f"{app.config['SQLALCHEMY_DATABASE_URI']} already has potholes; use an empty database")
+        generate(args.potholes, args.users, args.seed, verbose=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Scalar haversine_m loop vs. the vectorised haversine_many / nearest_within.
+
+    python -m benchmarks.haversine [sizes...]     (default: 1000 100000 1000000)
+"""
+import random, sys, time
+import numpy as np
+from benchmarks.common import random_points
+from services.geo import haversine_m, haversine_many, nearest_within
+
+def _time(fn):
+    t = time.perf_counter(); out = fn(); return (time.perf_counter() - t) * 1000, out
+
+def main(sizes):
+    print(f"{'points':>9} {'scalar ms':>10} {'vector ms':>10} {'speedup':>8} {'max |err| m':>12}")
+    for n in sizes:
+        pts = np.array(random_points(n, random.Random(n)))
+        lat, lon = pts[0]
+        lats, lons = pts[:, 0], pts[:, 1]
+        lats_l, lons_l = lats.tolist(), lons.tolist()
+        scalar_ms, ref = _time(lambda: [haversine_m(lat, lon, a, b) for a, b in zip(lats_l, lons_l)])
+        vector_ms, got = _time(lambda: haversine_many(lat, lon, lats, lons))
+        err = float(np.max(np.abs(got - np.array(ref))))
+        assert err <= 1e-6, err
+        print(f"{n:>9} {scalar_ms:>10.2f} {vector_ms:>10.2f} {scalar_ms / vector_ms:>7.1f}x {err:>12.2e}")
+
+    # N new reports against M existing potholes in one pass
+    new = random_points(1000, random.Random(1))
+    print(f"\n{'existing':>9} {'nearest_within(1000 new) ms':>28}")
+    for m in sizes:
+        existing = random_points(m, random.Random(m))
+        ms, _ = _time(lambda: nearest_within(new, 30, existing))
+        print(f"{m:>9} {ms:>28.1f}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,95 @@
+"""Latency and queries per request for the key routes, on generated data.
+
+    python -m benchmarks.load [--potholes N] [--users N] [--requests N] [--no-cache]
+
+Builds a throwaway database with benchmarks.datagen, then drives each route
+through the Flask test client (no network, so the numbers are the app + DB
+cost) and prints p50 / p99 latency and the queries each request issued.
+"""
+import argparse, logging, random, statistics, time
+from benchmarks.common import CENTER, bench_app, random_address
+from benchmarks.datagen import PASSWORD, generate
+
+def _pct(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--potholes", type=int, default=100_000)
+    ap.add_argument("--users", type=int, default=None, help="default: potholes / 10")
+    ap.add_argument("--requests", type=int, default=100, help="requests per route")
+    ap.add_argument("--no-cache", action="store_true", help="run with CACHE_BACKEND=null")
+    args = ap.parse_args()
+
+    overrides = dict(TESTING=True)
+    if args.no_cache:
+        overrides["CACHE_BACKEND"] = "null"
+    app = bench_app(f"load_{args.potholes}", **overrides)
+    app.logger.setLevel(logging.ERROR)   # every request here would be flagged by the query-stats log
+    from extensions import db, query_stats
+    from models import Pothole
+    with app.app_context():
+        t = time.perf_counter()
+        summary = generate(args.potholes, args.users if args.users is not None else max(args.potholes // 10, 10))
+        print(f"generated {summary['potholes']} potholes, {summary['users']} users, {summary['reports']} reports, "
+              f"{summary['work_orders']} work orders in {time.perf_counter() - t:.0f}s")
+        public_ids = [r[0] for r in db.session.execute(
+            db.select(Pothole.public_id).order_by(db.func.random()).limit(args.requests))]
+
+    clients = {}
+    for role in ("admin", "citizen"):
+        clients[role] = app.test_client()
+        r = clients[role].post("/auth/login", data={"email": summary["logins"][role], "password": PASSWORD})
+        assert r.status_code == 302, f"login {role}: {r.status_code}"
+    clients["anon"] = app.test_client()
+    rng = random.Random(7)
+    etags = {}
+
+    def report():
+        lat, lon = CENTER[0] + rng.uniform(-0.15, 0.15), CENTER[1] + rng.uniform(-0.15, 0.15)
+        return ("citizen", "post", "/report", dict(data={"street_address": random_address(rng), "size_1_10": "6",
+                                                         "latitude": str(lat), "longitude": str(lon)}))
+    def track_etag():
+        pid = rng.choice(public_ids)
+        if pid not in etags:
+            etags[pid] = clients["anon"].get(f"/api/potholes/{pid}").headers["ETag"]
+        return ("anon", "get", f"/api/potholes/{pid}", dict(headers={"If-None-Match": etags[pid]}))
+    def admin_page2():
+        page = clients["admin"].get("/admin/potholes").get_data(as_text=True)
+        after = page.split('/admin/potholes?after=', 1)[1].split('"', 1)[0].split("&", 1)[0]
+        return ("admin", "get", f"/admin/potholes?after={after}", {})
+
+    routes = [
+        ("public.home", lambda: ("anon", "get", "/", {})),
+        ("public.report (POST)", report),
+        ("user.dashboard", lambda: ("citizen", "get", "/user/dashboard", {})),
+        ("user.dashboard page 3", lambda: ("citizen", "get", "/user/dashboard?page=3", {})),
+        ("admin.potholes", lambda: ("admin", "get", "/admin/potholes", {})),
+        ("admin.potholes status", lambda: ("admin", "get", "/admin/potholes?status=in_progress", {})),
+        ("admin.potholes search", lambda: ("admin", "get", "/admin/potholes?q=" + rng.choice(
+            ["gulshan", "mosque road", "bazar", "house #12"]), {})),
+        ("admin.potholes page 2", admin_page2),
+        ("admin.work_orders", lambda: ("admin", "get", "/admin/work-orders", {})),
+        ("api search", lambda: ("anon", "get", "/api/potholes/search?q=" + rng.choice(
+            ["banani", "lake road", "college", "mirpur"]), {})),
+        ("api pothole", lambda: ("anon", "get", f"/api/potholes/{rng.choice(public_ids)}", {})),
+        ("api pothole (304)", track_etag),
+    ]
+
+    print(f"\n{'route':<24} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'queries':>8} {'max q':>6}")
+    for name, make in routes:
+        latencies, queries = [], []
+        for _ in range(args.requests):
+            who, method, url, kw = make()
+            with query_stats.collect() as log:
+                t = time.perf_counter()
+                r = getattr(clients[who], method)(url, **kw)
+                latencies.append((time.perf_counter() - t) * 1000)
+            assert r.status_code < 400, f"{name}: {method.upper()} {url} -> {r.status_code}"
+            queries.append(log.count)
+        print(f"{name:<24} {_pct(latencies, 0.50):>8.2f} {_pct(latencies, 0.99):>8.2f} "
+              f"{statistics.fmean(latencies):>8.2f} {statistics.fmean(queries):>8.1f} {max(queries):>6}")
+
+if __name__ == "__main__":
+    main()
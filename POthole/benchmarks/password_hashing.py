@@ -0,0 +1,78 @@
+"""Logins per second per core for each password hashing setting.
+
+    python -m benchmarks.password_hashing [--seconds S] [--methods M ...]
+
+For every method this reports how many hashes one core verifies per second,
+then full POST /auth/login round trips through the test client on one
+thread, the same with verification on the PASSWORD_VERIFY_WORKERS pool, and
+finally --threads concurrent clients against a pool of one worker per core.
+Each setting is also checked to upgrade a hash made with the default method
+at first login.
+"""
+import argparse, logging, os, threading, time
+from werkzeug.security import check_password_hash, generate_password_hash
+from benchmarks.common import bench_app
+from benchmarks.datagen import PASSWORD
+
+METHODS = ["scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:1000000", "pbkdf2:sha256:600000",
+           "pbkdf2:sha256:100000"]
+
+def _rate(fn, seconds):
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn(); n += 1
+    return n / (time.perf_counter() - t0)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=3.0, help="time spent on each measurement")
+    ap.add_argument("--threads", type=int, default=8, help="concurrent clients for the pooled run")
+    ap.add_argument("--methods", nargs="*", default=METHODS)
+    args = ap.parse_args()
+    cores = os.cpu_count() or 1
+
+    app = bench_app("passwords", TESTING=True)
+    app.logger.setLevel(logging.ERROR)
+    from extensions import db
+    from models import User
+    import services.passwords as passwords
+    with app.app_context():
+        db.session.add_all([User(name=f"bench{i}", email=f"bench{i}@example.org", role="citizen",
+                                 password_hash=generate_password_hash(PASSWORD)) for i in range(args.threads)])
+        db.session.commit()
+
+    def login(client, i=0):
+        r = client.post("/auth/login", data={"email": f"bench{i}@example.org", "password": PASSWORD})
+        assert r.status_code == 302, r.status_code
+        client.get("/auth/logout")
+
+    print(f"{cores} core(s)\n{'method':<24} {'verify/s':>9} {'login/s':>8} {'pooled':>8} "
+          f"{'x' + str(args.threads) + ' thr':>8} {'per core':>9}")
+    for method in args.methods:
+        app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_VERIFY_WORKERS=0)
+        login(app.test_client())                     # upgrades bench0 from the default method
+        with app.app_context():
+            stored = db.session.scalar(db.select(User.password_hash).where(User.email == "bench0@example.org"))
+            assert not passwords.needs_rehash(stored), stored
+        h = generate_password_hash(PASSWORD, method=method)
+        verify = _rate(lambda: check_password_hash(h, PASSWORD), args.seconds)
+        client = app.test_client()
+        inline = _rate(lambda: login(client), args.seconds)
+        app.config["PASSWORD_VERIFY_WORKERS"] = cores
+        passwords._executor = passwords._slots = None     # fresh pool sized for this run
+        pooled = _rate(lambda: login(client), args.seconds)
+
+        done, t0 = [0] * args.threads, time.perf_counter()
+        def worker(i):
+            c = app.test_client()
+            while time.perf_counter() - t0 < args.seconds:
+                login(c, i); done[i] += 1
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        concurrent = sum(done) / (time.perf_counter() - t0)     # logins still in flight at the deadline count too
+        print(f"{method:<24} {verify:>9.1f} {inline:>8.1f} {pooled:>8.1f} {concurrent:>8.1f} "
+              f"{concurrent / cores:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Hold the hot routes to a fixed number of queries per request.
+
+    python -m benchmarks.query_budgets [potholes]        (default: 5000)
+
+Seeds a throwaway database with benchmarks.datagen, then requests each route
+below inside query_stats.assert_max_queries(budget). Query counts don't
+depend on data volume once the pages are full, so a small database is
+enough. Exits non-zero, listing the statements, if any route goes over its
+budget, e.g. when a template starts lazy-loading a relationship per row
+again. Caching is off so every request reaches the database.
+"""
+import logging, re, sys
+from benchmarks.common import bench_app
+from benchmarks.datagen import PASSWORD, generate
+
+def main(n):
+    app = bench_app(f"budgets_{n}", TESTING=True, CACHE_BACKEND="null", USER_CACHE_SIZE=0)
+    app.logger.setLevel(logging.ERROR)
+    from extensions import db, query_stats
+    from models import Pothole, WorkOrder
+    with app.app_context():
+        logins = generate(n, max(n // 10, 10))["logins"]
+        pid = db.session.get(Pothole, n // 2).public_id
+        wo_pothole = db.session.scalar(db.select(WorkOrder.pothole_id).limit(1))
+
+    clients = {name: app.test_client() for name in ("anon", "citizen", "staff", "admin")}
+    for name in ("citizen", "staff", "admin"):
+        r = clients[name].post("/auth/login", data={"email": logins[name], "password": PASSWORD})
+        assert r.status_code == 302, f"login {name}: {r.status_code}"
+    after = lambda: re.search(r'/admin/potholes\?after=([^"&]+)',
+                              clients["admin"].get("/admin/potholes").get_data(as_text=True)).group(1)
+    # (who, url, budget): the budget is what the page needs today; raise it only on purpose
+    routes = [
+        ("anon", "/", 2),
+        ("anon", f"/track/{pid}", 2),
+        ("anon", f"/api/potholes/{pid}", 1),
+        ("citizen", "/user/dashboard", 6),
+        ("citizen", "/user/dashboard?page=3", 7),    # + the pager's count(*)
+        ("staff", "/staff/", 2),
+        ("staff", f"/staff/pothole/{wo_pothole}", 4),
+        ("admin", "/admin/", 5),
+        ("admin", "/admin/potholes", 5),
+        ("admin", "/admin/potholes?status=reported", 5),
+        ("admin", lambda: f"/admin/potholes?after={after()}", 5),
+        ("admin", "/admin/work-orders", 3),
+    ]
+    failures = 0
+    for who, url, budget in routes:
+        url = url() if callable(url) else url
+        try:
+            with query_stats.assert_max_queries(budget) as log:
+                r = clients[who].get(url)
+            assert r.status_code < 400, f"GET {url} -> {r.status_code}"
+            print(f"ok    {log.count:>3} / {budget:<3} {url}")
+        except AssertionError as e:
+            failures += 1
+            print(f"OVER        {url}: {e}")
+    print(f"\n{failures} route(s) over budget")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,110 @@
+"""EXPLAIN QUERY PLAN for every query the main routes run, on a seeded database.
+
+    python -m benchmarks.query_plans [potholes]        (default: 1000000)
+
+Seeds a throwaway SQLite database, drives each route through the test client
+while recording the SQL it sends, then asks SQLite for the plan of every
+distinct statement. Exits non-zero if any statement scans a whole table
+(a bare "SCAN <table>") other than the small lookup tables below. Index scans
+("SCAN t USING INDEX ...") are listed but allowed: they are ordered walks that
+stop at the LIMIT, or covering-index counts.
+"""
+import logging, re, sys
+from collections import defaultdict
+from sqlalchemy import event
+from benchmarks.common import bench_app
+from benchmarks.datagen import PASSWORD, generate
+
+# lookup tables that stay tiny no matter how many potholes there are
+SMALL_TABLES = {"district", "crew", "crew_membership", "team", "team_membership", "alembic_version"}
+# (endpoint, table) scans that are expected
+ALLOWED_SCANS = {
+    ("admin.users", "user"),             # lists every user
+    ("admin.users_overview", "user"),    # lists every reporter / staff member
+    ("admin.crews", "user"),             # every user, for the lead / member pickers
+}
+def login(client, email):
+    r = client.post("/auth/login", data={"email": email, "password": PASSWORD})
+    assert r.status_code == 302, f"login {email}: {r.status_code}"
+
+def main(n):
+    app = bench_app(f"plans_{n}", TESTING=True, CACHE_BACKEND="null")
+    app.logger.setLevel(logging.ERROR)
+    from extensions import db
+    from models import Pothole, WorkOrder
+    with app.app_context():
+        logins = generate(n, max(n // 10, 10))["logins"]
+        pid = db.session.get(Pothole, n // 2).public_id
+        wo = WorkOrder.query.first()
+
+    captured = defaultdict(dict)   # endpoint -> {statement: params}
+    current = {}
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and current:
+            captured[current["endpoint"]].setdefault(statement, parameters)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    clients = {name: app.test_client() for name in ("anon", "citizen", "staff", "lead", "admin")}
+    page = lambda c: re.search(rb'href="/admin/potholes\?after=([^"&]+)', c.get("/admin/potholes").data).group(1).decode()
+    calls = [
+        ("anon", "post", "/auth/login", dict(data={"email": logins["citizen"].upper(), "password": PASSWORD})),
+        ("anon", "get", "/", {}),
+        ("anon", "get", f"/track/{pid}", {}),
+        ("anon", "post", "/track", dict(data={"tracking_id": pid})),
+        ("anon", "get", f"/api/potholes/{pid}", {}),
+        ("anon", "get", "/api/potholes/search?q=gulshan", {}),
+        ("citizen", "get", "/user/dashboard", {}),
+        ("citizen", "get", "/user/dashboard?page=2", {}),
+        ("citizen", "post", "/report", dict(data={"street_address": "1 Plan Road", "size_1_10": "5",
+                                                  "latitude": "23.8103", "longitude": "90.4125"})),
+        ("staff", "get", "/staff/", {}),
+        ("staff", "get", f"/staff/pothole/{wo.pothole_id}", {}),
+        ("lead", "get", "/lead/", {}),
+        ("admin", "get", "/admin/", {}),
+        ("admin", "get", "/admin/potholes", {}),
+        ("admin", "get", "/admin/potholes?status=reported", {}),
+        ("admin", "get", "/admin/potholes?district_id=3", {}),
+        ("admin", "get", "/admin/potholes?q=mirpur", {}),
+        ("admin", "get", lambda: f"/admin/potholes?after={page(clients['admin'])}", {}),
+        ("admin", "get", "/admin/work-orders", {}),
+        ("admin", "get", "/admin/work-orders?crew_id=1&status=planned", {}),
+        ("admin", "get", "/admin/users", {}),
+        ("admin", "get", "/admin/users-overview", {}),
+        ("admin", "get", "/admin/crews", {}),
+    ]
+    for name in ("citizen", "staff", "lead", "admin"):
+        login(clients[name], logins[name])
+    for who, method, url, kw in calls:
+        url = url() if callable(url) else url
+        with app.test_request_context(url, method=method.upper()):
+            from flask import request
+            endpoint = request.url_rule.endpoint if request.url_rule else url
+        current["endpoint"] = endpoint
+        r = getattr(clients[who], method)(url, **kw)
+        current.clear()
+        assert r.status_code < 400, f"{method.upper()} {url}: {r.status_code}"
+
+    tables = set(db.metadata.tables)
+    failures = 0
+    with app.app_context():
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        with db.engine.connect() as conn:
+            for endpoint, statements in captured.items():
+                print(f"\n== {endpoint}")
+                for sql, params in statements.items():
+                    if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                        continue
+                    plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)]
+                    bad = [d for d in plan
+                           if (m := re.fullmatch(r"SCAN (\w+)(?: AS \w+)?", d)) and m.group(1) in tables
+                           and m.group(1) not in SMALL_TABLES and (endpoint, m.group(1)) not in ALLOWED_SCANS]
+                    failures += bool(bad)
+                    print(("FULL SCAN " if bad else "ok        ") + " ".join(sql.split())[:110])
+                    for d in plan:
+                        print(f"            {d}")
+    print(f"\n{failures} statement(s) with full table scans")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
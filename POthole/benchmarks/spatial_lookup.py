@@ -0,0 +1,50 @@
+"""Duplicate-pothole lookup: indexed grid-cell query vs. Python haversine scans.
+
+    python -m benchmarks.spatial_lookup [sizes...]     (default: 10000 100000 1000000)
+
+"latest-200" is the old public.report path (cheap but misses older duplicates),
+"full scan" is what finding every duplicate used to require.
+"""
+import random, sys
+from benchmarks.common import bench_app, insert_potholes, random_points, timed
+
+RADIUS_M = 30
+
+def main(sizes):
+    from extensions import db
+    from models import Pothole
+    from services.geo import find_nearby, haversine_m
+    print(f"{'potholes':>10} {'latest-200 ms':>14} {'full scan ms':>13} {'grid index ms':>14} {'hits':>5}")
+    for n in sizes:
+        app = bench_app(f"spatial_{n}")
+        with app.app_context():
+            insert_potholes(n)
+            probes = random_points(50, random.Random(7))
+
+            def latest_200():
+                lat, lon = probes[0]
+                for p in Pothole.query.order_by(Pothole.created_at.desc()).limit(200):
+                    d = haversine_m(lat, lon, p.latitude, p.longitude)
+                    if d is not None and d <= RADIUS_M: return p
+
+            def full_scan():
+                lat, lon = probes[0]
+                rows = db.session.execute(db.select(Pothole.id, Pothole.latitude, Pothole.longitude))
+                return [r.id for r in rows if (haversine_m(lat, lon, r.latitude, r.longitude) or 1e18) <= RADIUS_M]
+
+            it = iter(probes * 10)
+            def grid():
+                lat, lon = next(it)
+                hits = find_nearby(lat, lon, RADIUS_M)
+                db.session.expunge_all()
+                return hits
+
+            old_ms, _, _ = timed(latest_200, 20)
+            full_ms, _, expected = timed(full_scan, 3 if n >= 1_000_000 else 5)
+            grid_ms, _, _ = timed(grid, 200)
+            got = sorted(p.id for p, _ in find_nearby(*probes[0], RADIUS_M))
+            assert got == sorted(expected), "grid lookup disagrees with full scan"
+            print(f"{n:>10} {old_ms:>14.2f} {full_ms:>13.2f} {grid_ms:>14.3f} {len(got):>5}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -1,12 +1,19 @@
 ﻿from . import bp
-from flask import render_template, abort, request, redirect, url_for, flash
+from flask import render_template, abort, request, redirect, url_for, flash, Response, stream_with_context, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy import func
-from extensions import db
+from datetime import datetime, timedelta
+from sqlalchemy import func, and_, tuple_
+from sqlalchemy.orm import joinedload
+from extensions import db, cache
 from models import (
     User, District, Crew, CrewMembership,
     Pothole, WorkOrder, PotholeReport
 )
+from services.search import filter_potholes
+from services import export
+from services.dispatch import plan_dispatch, apply_dispatch
+from services import analytics
+from services.replica import read_only
 
 def _admin_only():
     return current_user.is_authenticated and current_user.role == "admin"
@@ -16,28 +23,35 @@ def guard():
     if not _admin_only():
         abort(403)
 
+DASHBOARD_STATS_KEY = "admin:dashboard:stats"
+_STAT_MODELS = {"users": User, "districts": District, "crews": Crew,
+                "potholes": Pothole, "work_orders": WorkOrder}
+# the stats only count rows, so updates (wallet balances, last-seen stamps, statuses) leave them alone
+cache.invalidate_on(*_STAT_MODELS.values(), keys=[DASHBOARD_STATS_KEY], changes=("insert", "delete"))
+
+def _headline_stats():
+    # all five counts in one round trip
+    counts = db.session.query(*[
+        db.select(func.count()).select_from(m).scalar_subquery() for m in _STAT_MODELS.values()
+    ]).one()
+    return dict(zip(_STAT_MODELS, counts))
+
 @bp.route("/")
+@read_only
 @login_required
 def dashboard():
-    stats = {
-        "users": User.query.count(),
-        "districts": District.query.count(),
-        "crews": Crew.query.count(),
-        "potholes": Pothole.query.count(),
-        "work_orders": WorkOrder.query.count(),
-    }
+    stats = cache.get_or_set(DASHBOARD_STATS_KEY, _headline_stats)
     latest_reported = (Pothole.query
                        .order_by(Pothole.created_at.desc())
                        .limit(8).all())
 
     # crews with active work (planned or in_progress)
     active_status = ["planned", "in_progress"]
-    crew_rows = []
-    for c in Crew.query.order_by(Crew.name.asc()).all():
-        count = (WorkOrder.query
-                 .filter(WorkOrder.crew_id == c.id, WorkOrder.status.in_(active_status))
-                 .count())
-        crew_rows.append({"crew": c, "active": count})
+    active = dict(db.session.query(WorkOrder.crew_id, func.count(WorkOrder.id))
+                  .filter(WorkOrder.status.in_(active_status), WorkOrder.crew_id.isnot(None))
+                  .group_by(WorkOrder.crew_id).all())
+    crew_rows = [{"crew": c, "active": active.get(c.id, 0)}
+                 for c in Crew.query.order_by(Crew.name.asc()).all()]
 
     return render_template("admin/dashboard.html",
                            stats=stats,
@@ -142,6 +156,8 @@ def remove_crew_member():
     return redirect(url_for("admin.crews"))
 
 # ----- Potholes + Assign crew + Update status -----
+POTHOLES_PER_PAGE = 50
+
 @bp.get("/potholes")
 @login_required
 def potholes():
@@ -149,7 +165,7 @@ def potholes():
     district_id = request.args.get("district_id")
     q_str = (request.args.get("q") or "").strip()
 
-    q = Pothole.query
+    q = Pothole.query.options(joinedload(Pothole.district))
     if status:
         q = q.filter(Pothole.status == status)
     if district_id:
@@ -158,20 +174,51 @@ def potholes():
         except ValueError:
             pass
     if q_str:
-        q = q.filter(Pothole.street_address.ilike(f"%{q_str}%"))
+        q = filter_potholes(q, q_str)
 
-    potholes = q.order_by(Pothole.created_at.desc()).all()
+    # keyset pagination on (created_at, id), newest first
+    after = _parse_cursor(request.args.get("after"))
+    if after:
+        q = q.filter(tuple_(Pothole.created_at, Pothole.id) < after)
+    potholes = (q.order_by(Pothole.created_at.desc(), Pothole.id.desc())
+                 .limit(POTHOLES_PER_PAGE + 1).all())
+    next_cursor = None
+    if len(potholes) > POTHOLES_PER_PAGE:
+        potholes = potholes[:POTHOLES_PER_PAGE]
+        last = potholes[-1]
+        next_cursor = f"{last.created_at.isoformat()}_{last.id}"
     crews = Crew.query.order_by(Crew.name.asc()).all()
     districts = District.query.order_by(District.name.asc()).all()
 
-    rows = []
-    for p in potholes:
-        wo = p.work_orders.order_by(WorkOrder.updated_at.desc()).first()
-        rows.append({"p": p, "wo": wo})
+    latest_wo = _latest_work_orders([p.id for p in potholes])
+    rows = [{"p": p, "wo": latest_wo.get(p.id)} for p in potholes]
 
     return render_template("admin/potholes.html",
                            rows=rows, crews=crews, districts=districts,
-                           selected_status=status, selected_district=district_id, q=q_str)
+                           selected_status=status, selected_district=district_id, q=q_str,
+                           after=request.args.get("after"), next_cursor=next_cursor)
+
+def _parse_cursor(raw):
+    # "<created_at iso>_<id>", as built for next_cursor above
+    try:
+        ts, pid = raw.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(pid)
+    except (AttributeError, ValueError):
+        return None
+
+def _latest_work_orders(pothole_ids):
+    """Most recently updated work order (crew eager-loaded) per pothole id, in one query."""
+    if not pothole_ids:
+        return {}
+    ranked = (db.select(WorkOrder.id, func.row_number().over(
+                  partition_by=WorkOrder.pothole_id,
+                  order_by=(WorkOrder.updated_at.desc(), WorkOrder.id.desc())).label("rn"))
+              .where(WorkOrder.pothole_id.in_(pothole_ids))
+              .subquery())
+    orders = (WorkOrder.query.options(joinedload(WorkOrder.crew))
+              .join(ranked, and_(ranked.c.id == WorkOrder.id, ranked.c.rn == 1))
+              .all())
+    return {wo.pothole_id: wo for wo in orders}
 
 @bp.post("/potholes/assign")
 @login_required
@@ -187,6 +234,21 @@ def assign_crew():
     flash(f"Crew '{crew.name}' assigned. WO #{wo.id} created.", "success")
     return redirect(url_for("admin.potholes"))
 
+@bp.post("/potholes/dispatch")
+@login_required
+def dispatch():
+    """Assign every reported pothole to a crew in one go (see services/dispatch.py)."""
+    plan = plan_dispatch()
+    high = sum(1 for a in plan if a["priority"] == "High")
+    crews = len({a["crew_id"] for a in plan})
+    if request.form.get("dry_run"):
+        flash(f"Dry run: {len(plan)} potholes ({high} High) would go to {crews} crews.", "info")
+    else:
+        made = apply_dispatch(plan)
+        db.session.commit()
+        flash(f"Dispatched {len(made)} potholes ({high} High) to {crews} crews.", "success")
+    return redirect(url_for("admin.potholes"))
+
 @bp.post("/potholes/status")
 @login_required
 def set_pothole_status():
@@ -200,11 +262,12 @@ def set_pothole_status():
 
 # ----- Work Orders (who is doing which work) -----
 @bp.get("/work-orders")
+@read_only
 @login_required
 def work_orders():
     crew_id = request.args.get("crew_id")
     status = (request.args.get("status") or "").strip()
-    q = WorkOrder.query
+    q = WorkOrder.query.options(joinedload(WorkOrder.pothole), joinedload(WorkOrder.crew))
     if crew_id:
         try:
             q = q.filter(WorkOrder.crew_id == int(crew_id))
@@ -226,4 +289,61 @@ def set_work_order_status():
     wo.status = status
     db.session.commit()
     flash("Work order status updated.", "success")
-    return redirect(url_for("admin.work_orders"))
+    return redirect(url_for("admin.work_orders"))
+
+# ----- Data export (streamed) -----
+@bp.get("/export/<entity>.<fmt>")
+@login_required
+def export_data(entity, fmt):
+    if entity not in export.EXPORTS or fmt not in export.FORMATS:
+        abort(404)
+    updated_since = None
+    if request.args.get("updated_since"):
+        try:
+            updated_since = datetime.fromisoformat(request.args["updated_since"])
+        except ValueError:
+            abort(400)
+    body = stream_with_context(export.stream(entity, fmt, updated_since))
+    return Response(body, mimetype=export.FORMATS[fmt],
+                    headers={"Content-Disposition": f"attachment; filename={entity}.{fmt}"})
+
+# ----- Analytics (reads the rollup tables only) -----
+def _analytics_args():
+    period = request.args.get("period", "week")
+    if period not in analytics.PERIODS:
+        abort(400)
+    days = min(request.args.get("days", 84, type=int), 3650)
+    since = datetime.utcnow().date() - timedelta(days=days)
+    return period, since
+
+@bp.get("/analytics")
+@login_required
+def analytics_page():
+    period, since = _analytics_args()
+    return render_template("admin/analytics.html", period=period, since=since,
+                           series=analytics.rollup_report(period, since),
+                           by_district=analytics.rollup_report(period, since, group_by="district", per_period=False),
+                           by_crew=analytics.rollup_report(period, since, group_by="crew", per_period=False),
+                           districts={d.id: d.name for d in District.query.all()},
+                           crews={c.id: c.name for c in Crew.query.all()})
+
+@bp.get("/analytics.json")
+@login_required
+def analytics_json():
+    period, since = _analytics_args()
+    group_by = request.args.get("group_by") or None
+    if group_by not in (None, "district", "crew"):
+        abort(400)
+    return jsonify({"period": period, "since": since.isoformat(),
+                    "rows": analytics.rollup_report(period, since, group_by=group_by)})
+
+@bp.post("/analytics/refresh")
+@login_required
+def analytics_refresh():
+    try:
+        n = analytics.refresh_rollups()
+    except analytics.RefreshInProgress:
+        flash("A rollup refresh is already running; try again in a minute.", "warning")
+    else:
+        flash(f"Rollups refreshed ({n} work orders processed).", "success")
+    return redirect(url_for("admin.analytics_page"))
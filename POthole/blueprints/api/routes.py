@@ -1,14 +1,63 @@
 ﻿from . import bp
-from flask import jsonify, request
+from flask import jsonify, request, current_app, abort
+from itertools import islice
 from extensions import db
-from models import Pothole
+from models import Pothole, WorkOrder
 from services.rules import compute_priority
-import uuid
+from services.search import search_potholes
+from services.ingest import ingest, ndjson_rows
+import io, uuid, hashlib
 
 @bp.route("/status")
 def status():
     return jsonify({"ok": True, "service": "PHTRS"})
 
+@bp.get("/potholes/search")
+def api_search_potholes():
+    q = (request.args.get("q") or "").strip()
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    return jsonify([{"public_id": p.public_id, "street_address": p.street_address,
+                     "status": p.status, "priority": p.priority}
+                    for p in search_potholes(q, limit=limit)])
+
+@bp.get("/potholes/<public_id>")
+def api_get_pothole(public_id):
+    """Tracking lookup for polling clients: compact JSON, ETag + If-None-Match.
+
+    One query fetches the pothole and its most recently updated work order;
+    the ETag is derived from both updated_at values, so an unchanged pothole
+    answers 304 with no body.
+    """
+    latest_wo = (db.select(WorkOrder.id).where(WorkOrder.pothole_id == Pothole.id)
+                 .order_by(WorkOrder.updated_at.desc(), WorkOrder.id.desc())
+                 .limit(1).correlate(Pothole).scalar_subquery())
+    row = db.session.execute(
+        db.select(Pothole.public_id, Pothole.street_address, Pothole.size_1_10, Pothole.location_type,
+                  Pothole.priority, Pothole.status, Pothole.created_at, Pothole.updated_at,
+                  WorkOrder.id.label("wo_id"), WorkOrder.status.label("wo_status"),
+                  WorkOrder.start_at.label("wo_start_at"), WorkOrder.end_at.label("wo_end_at"),
+                  WorkOrder.updated_at.label("wo_updated_at"))
+        .outerjoin(WorkOrder, WorkOrder.id == latest_wo)
+        .where(Pothole.public_id == public_id.strip().upper())
+    ).first()
+    if row is None:
+        abort(404)
+    iso = lambda d: d.isoformat() if d else None
+    tag = hashlib.sha1(f"{row.public_id}|{iso(row.updated_at)}|{row.wo_id}|{iso(row.wo_updated_at)}"
+                       .encode()).hexdigest()[:20]
+    resp = jsonify({
+        "public_id": row.public_id, "street_address": row.street_address, "size_1_10": row.size_1_10,
+        "location_type": row.location_type, "priority": row.priority, "status": row.status,
+        "reported_at": iso(row.created_at), "updated_at": iso(row.updated_at),
+        "work_order": None if row.wo_id is None else {
+            "status": row.wo_status, "start_at": iso(row.wo_start_at),
+            "end_at": iso(row.wo_end_at), "updated_at": iso(row.wo_updated_at)},
+    })
+    resp.set_etag(tag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = current_app.config.get("TRACK_CACHE_MAX_AGE", 10)
+    return resp.make_conditional(request)
+
 @bp.post("/potholes")
 def api_create_pothole():
     data = request.get_json(force=True)
@@ -21,4 +70,27 @@ def api_create_pothole():
     )
     db.session.add(ph)
     db.session.commit()
-    return jsonify({"public_id": ph.public_id, "id": ph.id})
+    return jsonify({"public_id": ph.public_id, "id": ph.id})
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+@bp.post("/potholes/bulk")
+def api_bulk_create_potholes():
+    """Create many potholes from a JSON array or an NDJSON body; one result per row."""
+    max_rows = current_app.config.get("BULK_INGEST_MAX_ROWS", 50000)
+    if request.mimetype in NDJSON_TYPES:
+        # request.stream is unbuffered; line iteration on it is very slow
+        rows = ndjson_rows(io.BufferedReader(request.stream, 64 * 1024))
+    else:
+        rows = request.get_json(force=True, silent=True)
+        if not isinstance(rows, list):
+            return jsonify({"error": "expected a JSON array or an NDJSON body"}), 400
+        if len(rows) > max_rows:
+            return jsonify({"error": f"at most {max_rows} rows per request"}), 413
+    results = list(ingest(islice(rows, max_rows),
+                          radius_m=current_app.config.get("DUPLICATE_RADIUS_M", 30),
+                          chunk_size=current_app.config.get("BULK_INGEST_CHUNK", 500)))
+    summary = {s: sum(1 for r in results if r["status"] == s) for s in ("created", "duplicate", "error")}
+    if request.mimetype in NDJSON_TYPES and next(rows, None) is not None:
+        summary["truncated"] = True   # rows past max_rows were not read
+    return jsonify({**summary, "results": results})
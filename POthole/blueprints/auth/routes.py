@@ -4,6 +4,7 @@ from flask_login import login_user, logout_user, login_required, current_user
 from sqlalchemy import or_, func
 from models import User
 from extensions import db
+from services.passwords import VerifyBusy
 
 def _post_login_redirect(user: User):
     if user.role == "admin":
@@ -33,9 +34,18 @@ def login():
                             func.lower(User.name)==ident.lower()))
                 .first())
 
-        if not user or not user.check_password(pwd):
+        try:
+            ok = user is not None and user.check_password(pwd)
+        except VerifyBusy:
+            flash("Too many sign-ins right now. Please try again in a moment.", "warning")
+            return render_template("auth/login.html"), 503
+        if not ok:
             flash("Invalid credentials.", "danger")
             return redirect(url_for("auth.login"))
+        if user.password_needs_rehash():
+            # hashed with older cost settings: store a hash made with the current ones
+            user.set_password(pwd)
+            db.session.commit()
 
         login_user(user, remember=remember)
         flash(f"Welcome back, {user.name}!", "success")
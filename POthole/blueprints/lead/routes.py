@@ -1,7 +1,9 @@
 ﻿
 from . import bp
-from flask import render_template, abort
+from flask import render_template, abort, request, jsonify
 from flask_login import login_required, current_user
+from models import Crew
+from services.routing import crew_route
 
 @bp.before_request
 def guard():
@@ -11,4 +13,15 @@ def guard():
 @bp.route("/")
 @login_required
 def dashboard():
-    return render_template("lead/dashboard.html")
+    crews = Crew.query.filter_by(lead_user_id=current_user.id).order_by(Crew.name.asc()).all()
+    routes = [(c, crew_route(c.id)) for c in crews]
+    return render_template("lead/dashboard.html", routes=routes)
+
+@bp.get("/crews/<int:crew_id>/route")
+@login_required
+def crew_route_json(crew_id):
+    """Planned work orders in driving order; ?lat=&lon= starts the route there."""
+    crew = Crew.query.filter_by(id=crew_id, lead_user_id=current_user.id).first_or_404()
+    lat = request.args.get("lat", type=float); lon = request.args.get("lon", type=float)
+    start = (lat, lon) if lat is not None and lon is not None else None
+    return jsonify(crew_route(crew.id, start=start))
@@ -1,29 +1,44 @@
 from . import bp
 from flask import render_template, request, redirect, url_for, flash, current_app, send_from_directory
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
-from extensions import db
+from sqlalchemy import func
+from extensions import db, cache
 from models import Pothole, District, WorkOrder, Crew, Photo, PotholeReport
 from services.rules import compute_priority
-from services.geo import normalize_address, haversine_m
-from services.wallet import credit_reward
-import os, uuid, hashlib
+from services.geo import normalize_address, find_nearby
+from services import storage, tasks, thumbnails
+from services.report_tasks import enqueue_followups
+from services.replica import read_only
+import uuid
+
+@bp.app_template_global()
+def photo_url(filename, size=None):
+    """URL of a photo derivative ("thumb"/"web"), or of the original until it's ready."""
+    if size and thumbnails.derivative_ready(current_app.config["UPLOAD_FOLDER"], filename, size):
+        filename = thumbnails.derivative_name(filename, size)
+    return url_for("public.uploaded_file", filename=filename)
 
 def _allowed(filename):
     ext = filename.rsplit(".",1)[-1].lower()
     return ext in current_app.config.get("ALLOWED_EXTENSIONS", set())
 
+HOME_BOARD_KEY = "public:home:board"
+cache.invalidate_on(Pothole, keys=[HOME_BOARD_KEY])
+
+def _render_home_board():
+    by_status = dict(db.session.query(Pothole.status, func.count(Pothole.id)).group_by(Pothole.status).all())
+    stats = dict(total=sum(by_status.values()), reported=by_status.get("reported", 0),
+                 in_progress=by_status.get("in_progress", 0), repaired=by_status.get("repaired", 0))
+    latest = Pothole.query.order_by(Pothole.created_at.desc()).limit(6).all()
+    return render_template("public/home_board.html", stats=stats, latest=latest)
+
 @bp.route("/")
+@read_only
 def home():
-    # Stats
-    total = Pothole.query.count()
-    reported = Pothole.query.filter_by(status="reported").count()
-    in_prog = Pothole.query.filter_by(status="in_progress").count()
-    repaired = Pothole.query.filter_by(status="repaired").count()
-    latest = Pothole.query.order_by(Pothole.created_at.desc()).limit(6).all()
-    return render_template("public/home.html",
-                           stats=dict(total=total, reported=reported, in_progress=in_prog, repaired=repaired),
-                           latest=latest)
+    # stats + latest list are identical for every visitor: serve the rendered block from cache
+    board = cache.get_or_set(HOME_BOARD_KEY, _render_home_board,
+                             ttl=current_app.config.get("HOME_CACHE_TTL", 15))
+    return render_template("public/home.html", board=board)
 
 @bp.post("/track")
 def track_lookup():
@@ -53,10 +68,8 @@ def report():
         addr_norm = normalize_address(addr)
         candidate = Pothole.query.filter_by(address_norm=addr_norm).first()
         if not candidate and (lat is not None and lon is not None):
-            for p in Pothole.query.order_by(Pothole.created_at.desc()).limit(200):
-                d = haversine_m(lat, lon, p.latitude, p.longitude)
-                if d is not None and d <= 30:
-                    candidate = p; break
+            nearby = find_nearby(lat, lon, current_app.config.get("DUPLICATE_RADIUS_M", 30))
+            if nearby: candidate = nearby[0][0]
         if candidate:
             pothole = candidate; is_dup = True
         else:
@@ -72,28 +85,39 @@ def report():
             is_dup = False
 
         files = request.files.getlist("photos"); saved = 0
-        upload_dir = current_app.config["UPLOAD_FOLDER"]; os.makedirs(upload_dir, exist_ok=True)
-        for f in files:
-            if not f or not f.filename: continue
-            if not _allowed(f.filename): flash("Only JPG/PNG allowed.", "warning"); continue
-            fname = secure_filename(f.filename); unique = f"{uuid.uuid4().hex}_{fname}"
-            path = os.path.join(upload_dir, unique); f.save(path)
-            with open(path, "rb") as fh: h = hashlib.sha1(fh.read()).hexdigest()
-            exists = Photo.query.filter_by(pothole_id=pothole.id, file_hash=h).first()
-            if exists: continue
-            db.session.add(Photo(pothole_id=pothole.id, reporter_id=current_user.id, filename=unique, file_hash=h)); saved += 1
+        upload_dir = current_app.config["UPLOAD_FOLDER"]
+        pending = []  # (temp file, stored name), moved into storage only once the Photo rows commit
+        try:
+            for f in files:
+                if not f or not f.filename: continue
+                if not _allowed(f.filename): flash("Only JPG/PNG allowed.", "warning"); continue
+                # hash while spooling to a temp file, then keep it only if it's new for this pothole
+                h, tmp = storage.spool(f.stream, upload_dir)
+                exists = Photo.query.filter_by(pothole_id=pothole.id, file_hash=h).first()
+                if exists: storage.discard(tmp); continue
+                name = storage.stored_name(h, f.filename.rsplit(".", 1)[-1])
+                pending.append((tmp, name))
+                db.session.add(Photo(pothole_id=pothole.id, reporter_id=current_user.id, filename=name, file_hash=h)); saved += 1
 
-        report = PotholeReport(pothole_id=pothole.id, reporter_id=current_user.id, is_duplicate=is_dup, photo_count=saved)
-        db.session.add(report); db.session.flush()
-        if not is_dup: credit_reward(current_user.id, report.id)
-        db.session.commit()
+            report = PotholeReport(pothole_id=pothole.id, reporter_id=current_user.id, is_duplicate=is_dup, photo_count=saved)
+            db.session.add(report); db.session.flush()
+            # reward and thumbnails run on the task queue (services/report_tasks.py)
+            enqueue_followups(report, [name for _, name in pending])
+            db.session.commit()
+        except BaseException:
+            for tmp, _ in pending: storage.discard(tmp)
+            raise
+        for tmp, name in pending:
+            storage.keep(tmp, upload_dir, name)
+        tasks.kick()
 
-        flash(("This pothole was already reported. " if is_dup else "Report submitted. +20 Tk credited. ")
+        flash(("This pothole was already reported. " if is_dup else "Report submitted. +20 Tk will be credited shortly. ")
               + f"Tracking ID: {pothole.public_id}", "success" if not is_dup else "warning")
         return redirect(url_for("public.track", public_id=pothole.public_id))
     return render_template("public/report.html")
 
 @bp.route("/track/<public_id>")
+@read_only
 def track(public_id):
     pothole = Pothole.query.filter_by(public_id=public_id).first_or_404()
     work_orders = pothole.work_orders.order_by(WorkOrder.updated_at.desc()).all()
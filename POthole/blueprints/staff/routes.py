@@ -3,6 +3,8 @@ from flask import render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from extensions import db
 from models import Pothole, WorkOrder, Crew
+from services.cost import price_work_order
+from services.replica import read_only
 from datetime import datetime
 
 @bp.before_request
@@ -13,6 +15,7 @@ def guard():
         abort(403)
 
 @bp.route("/")
+@read_only
 @login_required
 def dashboard():
     q = Pothole.query.order_by(Pothole.created_at.desc()).limit(200).all()
@@ -40,8 +43,7 @@ def edit_pothole(pid):
             wo.filler_material_kg = float(request.form.get("filler_material_kg", 0) or 0)
             wo.material_cost = float(request.form.get("material_cost", 0) or 0)
             wo.equipment_cost = float(request.form.get("equipment_cost", 0) or 0)
-            wo.labor_cost = wo.hours_applied * max(wo.people_used, 1) * 30
-            wo.total_cost = wo.labor_cost + wo.material_cost + wo.equipment_cost
+            price_work_order(wo, pothole.district_id)
             wo.status = request.form.get("wo_status", "in_progress")
             if wo.status == "completed":
                 pothole.status = "repaired"
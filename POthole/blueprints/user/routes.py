@@ -1,8 +1,13 @@
 ﻿from . import bp
-from flask import render_template, abort
+from collections import defaultdict
+from flask import render_template, abort, request
 from flask_login import login_required, current_user
+from sqlalchemy import func
+from extensions import db
 from models import PotholeReport, Pothole, WalletTransaction, Photo
 
+REPORTS_PER_PAGE = 20
+
 @bp.before_request
 def guard():
     if not (current_user.is_authenticated and current_user.role == "citizen"):
@@ -11,29 +16,34 @@ def guard():
 @bp.route("/dashboard")
 @login_required
 def dashboard():
-    reports = (PotholeReport.query
-               .filter_by(reporter_id=current_user.id)
-               .order_by(PotholeReport.created_at.desc())
-               .all())
-
-    items = []
-    for r in reports:
-        p = Pothole.query.get(r.pothole_id)
-        if not p:
-            continue
-        photos = (Photo.query
-                  .filter_by(pothole_id=p.id, reporter_id=current_user.id)
-                  .order_by(Photo.created_at.desc())
-                  .all())
-        items.append({"report": r, "pothole": p, "photos": photos})
-
-    latest = items[:6]
-
-    total = len(items)
-    reported = sum(1 for it in items if it["pothole"].status == "reported")
-    in_prog = sum(1 for it in items if it["pothole"].status == "in_progress")
-    repaired = sum(1 for it in items if it["pothole"].status == "repaired")
-    stats = dict(total=total, reported=reported, in_progress=in_prog, repaired=repaired)
+    page = request.args.get("page", 1, type=int)
+    mine = (db.session.query(PotholeReport, Pothole)
+            .join(Pothole, Pothole.id == PotholeReport.pothole_id)
+            .filter(PotholeReport.reporter_id == current_user.id)
+            .order_by(PotholeReport.created_at.desc(), PotholeReport.id.desc()))
+    pager = mine.paginate(page=page, per_page=REPORTS_PER_PAGE, error_out=False)
+    latest_rows = pager.items[:6] if pager.page == 1 else mine.limit(6).all()
+
+    # photos for every pothole on screen, in one query
+    photos = defaultdict(list)
+    pothole_ids = {p.id for _, p in pager.items + latest_rows}
+    if pothole_ids:
+        for ph in (Photo.query
+                   .filter(Photo.pothole_id.in_(pothole_ids), Photo.reporter_id == current_user.id)
+                   .order_by(Photo.created_at.desc())):
+            photos[ph.pothole_id].append(ph)
+
+    def as_items(rows):
+        return [{"report": r, "pothole": p, "photos": photos[p.id]} for r, p in rows]
+
+    by_status = dict(db.session.query(Pothole.status, func.count(PotholeReport.id))
+                     .join(PotholeReport, PotholeReport.pothole_id == Pothole.id)
+                     .filter(PotholeReport.reporter_id == current_user.id)
+                     .group_by(Pothole.status).all())
+    stats = dict(total=sum(by_status.values()),
+                 reported=by_status.get("reported", 0),
+                 in_progress=by_status.get("in_progress", 0),
+                 repaired=by_status.get("repaired", 0))
 
     txs = (WalletTransaction.query
            .filter_by(user_id=current_user.id)
@@ -44,7 +54,8 @@ def dashboard():
         "user/reporter_dashboard.html",
         wallet=current_user.wallet_balance,
         stats=stats,
-        latest=latest,
-        items=items,
+        latest=as_items(latest_rows),
+        items=as_items(pager.items),
+        pager=pager,
         txs=txs
-    )
+    )
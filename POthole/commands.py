@@ -0,0 +1,154 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+from extensions import db
+
+wallet_cli = AppGroup("wallet", help="Wallet maintenance.")
+
+@wallet_cli.command("reconcile")
+@click.option("--fix", is_flag=True, help="Rewrite drifted cached balances from the ledger.")
+def wallet_reconcile(fix):
+    """Re-derive every wallet balance from the ledger and report drift."""
+    from services.wallet import reconcile_balances
+    drift = reconcile_balances(fix=fix)
+    for uid, cached, ledger in drift:
+        click.echo(f"user {uid}: cached {cached:.2f} ledger {ledger:.2f} (drift {cached - ledger:+.2f})")
+    if fix:
+        db.session.commit()
+    click.echo(f"{len(drift)} drifted balance(s)" + (" fixed." if fix and drift else "."))
+
+analytics_cli = AppGroup("analytics", help="Reporting rollups.")
+
+@analytics_cli.command("refresh")
+def analytics_refresh():
+    """Fold work orders changed since the last run into the rollups."""
+    from services.analytics import RefreshInProgress, refresh_rollups
+    try:
+        click.echo(f"{refresh_rollups()} work order(s) processed.")
+    except RefreshInProgress as e:
+        raise click.ClickException(str(e))
+
+@analytics_cli.command("rebuild")
+def analytics_rebuild():
+    """Recompute every rollup from the work orders."""
+    from services.analytics import RefreshInProgress, rebuild_rollups
+    try:
+        click.echo(f"{rebuild_rollups()} work order(s) processed.")
+    except RefreshInProgress as e:
+        raise click.ClickException(str(e))
+
+costs_cli = AppGroup("costs", help="Labor rates and work order pricing.")
+
+@costs_cli.command("rates")
+def costs_rates():
+    """List the configured hourly rates."""
+    from services.cost import rate_table
+    for (district_id, crew_id), rate in sorted(rate_table().items(), key=lambda kv: (kv[0][0] or 0, kv[0][1] or 0)):
+        click.echo(f"district {district_id or '*'} crew {crew_id or '*'}: {rate:.2f}/h per person")
+
+@costs_cli.command("set-rate")
+@click.argument("rate", type=float)
+@click.option("--district", "district_id", type=int, help="Only for this district.")
+@click.option("--crew", "crew_id", type=int, help="Only for this crew.")
+def costs_set_rate(rate, district_id, crew_id):
+    """Set the hourly rate per person for a district and/or crew (neither: the default)."""
+    from services.cost import set_rate
+    set_rate(rate, district_id, crew_id)
+    db.session.commit()
+    click.echo("Rate saved. Run 'flask costs recompute' to re-price existing work orders.")
+
+@costs_cli.command("recompute")
+@click.option("--dry-run", is_flag=True, help="Report the change without writing it.")
+def costs_recompute(dry_run):
+    """Re-price every work order with the current rates."""
+    from services.cost import recompute_costs
+    r = recompute_costs(dry_run=dry_run)
+    click.echo(f"{r['examined']} work orders examined, {r['changed']} " + ("would change" if dry_run else "changed")
+               + f"; labor {r['labor_delta']:+.2f}, total {r['total_delta']:+.2f}.")
+
+replica_cli = AppGroup("replica", help="Read replica (see services/replica.py).")
+
+@replica_cli.command("sync")
+def replica_sync():
+    """Copy the primary SQLite database onto the replica file."""
+    from services.replica import REPLICA, sync_sqlite
+    if REPLICA not in db.engines:
+        raise click.ClickException("No replica configured; set REPLICA_DATABASE_URL.")
+    try:
+        sync_sqlite(db)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Copied {db.engines[None].url} to {db.engines[REPLICA].url}.")
+
+tasks_cli = AppGroup("tasks", help="Background task queue (see services/tasks.py).")
+
+@tasks_cli.command("work")
+@click.option("--once", is_flag=True, help="Exit when no task is due instead of waiting.")
+@click.option("--sleep", "idle_sleep", type=float, default=1.0, show_default=True,
+              help="Seconds to wait when the queue is empty.")
+def tasks_work(once, idle_sleep):
+    """Run queued tasks."""
+    from services.tasks import work
+    click.echo(f"{work(once=once, idle_sleep=idle_sleep)} task(s) run.")
+
+@tasks_cli.command("status")
+def tasks_status():
+    """Count tasks by name and status."""
+    from services.tasks import counts
+    for (name, status), n in sorted(counts().items()):
+        click.echo(f"{name:<20} {status:<8} {n}")
+
+@tasks_cli.command("retry")
+@click.option("--name", help="Only tasks with this name.")
+def tasks_retry(name):
+    """Queue failed tasks again."""
+    from services.tasks import retry_failed
+    n = retry_failed(name)
+    db.session.commit()
+    click.echo(f"{n} task(s) queued again.")
+
+@tasks_cli.command("prune")
+@click.option("--days", type=int, default=7, show_default=True, help="Keep done tasks this many days.")
+def tasks_prune(days):
+    """Delete finished tasks older than --days."""
+    from datetime import datetime, timedelta
+    from services.tasks import prune
+    n = prune(datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    click.echo(f"{n} done task(s) deleted.")
+
+@click.command("export")
+@click.argument("entity", type=click.Choice(["potholes", "work_orders", "wallet_transactions"]))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True)
+@click.option("--updated-since", type=click.DateTime(), help="Only rows updated after this time.")
+@click.option("-o", "--output", type=click.File("w"), default="-", help="Output file (default: stdout).")
+@with_appcontext
+def export_command(entity, fmt, updated_since, output):
+    """Stream a table out as CSV or NDJSON."""
+    from services.export import stream
+    for chunk in stream(entity, fmt, updated_since):
+        output.write(chunk)
+
+@click.command("dispatch")
+@click.option("--dry-run", is_flag=True, help="Show the plan without creating work orders.")
+@click.option("--limit", type=int, help="Dispatch at most this many potholes.")
+@with_appcontext
+def dispatch_command(dry_run, limit):
+    """Assign reported potholes to crews by priority and proximity."""
+    from services.dispatch import plan_dispatch, apply_dispatch, summarize
+    plan = plan_dispatch(limit)
+    if not dry_run:
+        plan = apply_dispatch(plan)
+        db.session.commit()
+    for crew_id, row in sorted(summarize(plan).items()):
+        click.echo(f"crew {crew_id}: {row['orders']} orders "
+                   f"(High {row.get('High', 0)}, Medium {row.get('Medium', 0)}, Low {row.get('Low', 0)})")
+    click.echo(f"{len(plan)} potholes " + ("would be dispatched (dry run)." if dry_run else "dispatched."))
+
+def register_commands(app):
+    app.cli.add_command(wallet_cli)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(costs_cli)
+    app.cli.add_command(replica_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(dispatch_command)
@@ -5,7 +5,86 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///phtrs.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # database engine profile (see services/engine.py): empty here, so SQLAlchemy's and
+    # SQLite's defaults apply; ProductionConfig sets them
+    DB_POOL = {}
+    SQLITE_PRAGMAS = {}
+
+    # read replica (see services/replica.py): pages marked read_only read from it, except for
+    # a browser session that committed a write in the last REPLICA_STICKY_S seconds
+    SQLALCHEMY_BINDS = {"replica": os.environ["REPLICA_DATABASE_URL"]} if os.getenv("REPLICA_DATABASE_URL") else {}
+    REPLICA_STICKY_S = float(os.getenv("REPLICA_STICKY_S", 10))
+
     # uploads
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "static", "uploads")
     MAX_CONTENT_LENGTH = 8 * 1024 * 1024  # 8 MB
-    ALLOWED_EXTENSIONS = {"jpg","jpeg","png"}
+    ALLOWED_EXTENSIONS = {"jpg","jpeg","png"}
+
+    # caching (see services/cache.py)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local")
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", 30))
+    HOME_CACHE_TTL = int(os.getenv("HOME_CACHE_TTL", 15))
+
+    # password hashing (see services/passwords.py): any werkzeug method string;
+    # older hashes are upgraded at the user's next successful login
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_VERIFY_WORKERS = int(os.getenv("PASSWORD_VERIFY_WORKERS", 0))   # 0 = verify on the request thread
+    PASSWORD_VERIFY_TIMEOUT = float(os.getenv("PASSWORD_VERIFY_TIMEOUT", 5))
+
+    # logged-in user identity cache (see services/usercache.py); 0 disables it
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+
+    # duplicate detection
+    DUPLICATE_RADIUS_M = float(os.getenv("DUPLICATE_RADIUS_M", 30))
+
+    # bulk ingestion (POST /api/potholes/bulk)
+    BULK_INGEST_MAX_ROWS = int(os.getenv("BULK_INGEST_MAX_ROWS", 50000))
+    BULK_INGEST_CHUNK = int(os.getenv("BULK_INGEST_CHUNK", 500))
+
+    # GET /api/potholes/<public_id>: clients may reuse a response this long before revalidating
+    TRACK_CACHE_MAX_AGE = int(os.getenv("TRACK_CACHE_MAX_AGE", 10))
+
+    # per-request SQL instrumentation (see services/querystats.py)
+    QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "1") == "1"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+    MAX_QUERIES_PER_REQUEST = int(os.getenv("MAX_QUERIES_PER_REQUEST", 30))
+
+    # batch dispatch (see services/dispatch.py)
+    DISPATCH_ORDERS_PER_PERSON = int(os.getenv("DISPATCH_ORDERS_PER_PERSON", 2))
+    DISPATCH_NEW_ZONE_M = float(os.getenv("DISPATCH_NEW_ZONE_M", 3000))
+
+    # repair rollups (see services/analytics.py): re-read this much before the watermark
+    ROLLUP_WATERMARK_LAG_S = int(os.getenv("ROLLUP_WATERMARK_LAG_S", 60))
+    # a refresh that stops renewing its lease for this long (crashed) is taken over by the next one
+    ROLLUP_LEASE_S = int(os.getenv("ROLLUP_LEASE_S", 600))
+
+    # labor pricing when no cost_rate row matches (see services/cost.py)
+    DEFAULT_HOURLY_RATE = float(os.getenv("DEFAULT_HOURLY_RATE", 30))
+
+    # background tasks (see services/tasks.py), run by `flask tasks work`;
+    # TASKS_EAGER=1 runs them right after the request instead (development)
+    TASKS_EAGER = os.getenv("TASKS_EAGER", "0") == "1"
+    TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", 5))
+    TASK_RETRY_BASE_S = int(os.getenv("TASK_RETRY_BASE_S", 30))
+    # a running task is renewed every TASK_LEASE_S / 3; one unrenewed for TASK_LEASE_S is reclaimed
+    TASK_LEASE_S = int(os.getenv("TASK_LEASE_S", 300))
+
+class ProductionConfig(Config):
+    """Selected with APP_ENV=production."""
+    # pool per worker process; the QueuePool-only options are skipped for in-memory SQLite
+    DB_POOL = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
+    # run on every new SQLite connection
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    }
@@ -1,7 +1,17 @@
 ﻿from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from services.cache import Cache
+from services.querystats import QueryStats
+from services.usercache import UserCache
+from services.engine import EngineTuning
+from services.replica import ReplicaRouter, RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
-login_manager = LoginManager()
+login_manager = LoginManager()
+cache = Cache()
+query_stats = QueryStats()
+user_cache = UserCache()
+engine_tuning = EngineTuning()
+replica = ReplicaRouter()
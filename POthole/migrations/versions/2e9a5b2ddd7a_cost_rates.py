@@ -0,0 +1,35 @@
+"""cost rates
+
+Revision ID: 2e9a5b2ddd7a
+Revises: d8048e916537
+Create Date: 2026-10-18 10:12:58.375059
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e9a5b2ddd7a'
+down_revision = 'd8048e916537'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cost_rate',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=True),
+    sa.Column('crew_id', sa.Integer(), nullable=True),
+    sa.Column('hourly_rate_per_person', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['crew_id'], ['crew.id'], ),
+    sa.ForeignKeyConstraint(['district_id'], ['district.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('district_id', 'crew_id', name='uq_cost_rate_scope')
+    )
+
+
+def downgrade():
+    op.drop_table('cost_rate')
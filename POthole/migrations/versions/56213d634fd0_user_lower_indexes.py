@@ -0,0 +1,29 @@
+"""user lower indexes
+
+Expression indexes for the case-insensitive email/name lookups at login;
+autogenerate does not pick these up.
+
+Revision ID: 56213d634fd0
+Revises: 2e9a5b2ddd7a
+Create Date: 2026-10-18 10:15:48.063249
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '56213d634fd0'
+down_revision = '2e9a5b2ddd7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False)
+    op.create_index('ix_user_name_lower', 'user', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_name_lower', table_name='user')
+    op.drop_index('ix_user_email_lower', table_name='user')
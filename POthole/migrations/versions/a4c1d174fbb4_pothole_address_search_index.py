@@ -0,0 +1,66 @@
+"""pothole address search index
+
+Revision ID: a4c1d174fbb4
+Revises: fcce0ea6308b
+Create Date: 2026-10-18 10:41:05.772309
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c1d174fbb4'
+down_revision = 'fcce0ea6308b'
+branch_labels = None
+depends_on = None
+
+# written out here rather than imported from services.search, so this revision
+# doesn't depend on the current app code or models
+SQLITE_UP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pothole_fts USING fts5(
+           street_address, address_norm, content='pothole', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_ai AFTER INSERT ON pothole BEGIN
+           INSERT INTO pothole_fts(rowid, street_address, address_norm)
+           VALUES (new.id, new.street_address, new.address_norm);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_ad AFTER DELETE ON pothole BEGIN
+           INSERT INTO pothole_fts(pothole_fts, rowid, street_address, address_norm)
+           VALUES ('delete', old.id, old.street_address, old.address_norm);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_au AFTER UPDATE OF street_address, address_norm ON pothole BEGIN
+           INSERT INTO pothole_fts(pothole_fts, rowid, street_address, address_norm)
+           VALUES ('delete', old.id, old.street_address, old.address_norm);
+           INSERT INTO pothole_fts(rowid, street_address, address_norm)
+           VALUES (new.id, new.street_address, new.address_norm);
+       END""",
+    "INSERT INTO pothole_fts(pothole_fts) VALUES ('rebuild')",   # index existing rows
+]
+SQLITE_DOWN = [
+    "DROP TRIGGER IF EXISTS pothole_fts_ai",
+    "DROP TRIGGER IF EXISTS pothole_fts_ad",
+    "DROP TRIGGER IF EXISTS pothole_fts_au",
+    "DROP TABLE IF EXISTS pothole_fts",
+]
+POSTGRES_UP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_pothole_street_address_trgm ON pothole USING gin (street_address gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_pothole_address_norm_trgm ON pothole USING gin (address_norm gin_trgm_ops)",
+]
+POSTGRES_DOWN = [
+    "DROP INDEX IF EXISTS ix_pothole_street_address_trgm",
+    "DROP INDEX IF EXISTS ix_pothole_address_norm_trgm",
+]
+
+
+def upgrade():
+    # SQLite: FTS5 table + sync triggers (built from existing rows); Postgres: pg_trgm GIN indexes
+    dialect = op.get_bind().dialect.name
+    for stmt in {"sqlite": SQLITE_UP, "postgresql": POSTGRES_UP}.get(dialect, []):
+        op.execute(stmt)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for stmt in {"sqlite": SQLITE_DOWN, "postgresql": POSTGRES_DOWN}.get(dialect, []):
+        op.execute(stmt)
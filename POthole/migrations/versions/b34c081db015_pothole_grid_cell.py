@@ -0,0 +1,53 @@
+"""pothole grid cell
+
+Revision ID: b34c081db015
+Revises: 9f9045210d3c
+Create Date: 2026-10-18 09:12:41.504113
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b34c081db015'
+down_revision = '9f9045210d3c'
+branch_labels = None
+depends_on = None
+
+# the grid as of this revision (services/geo.py), frozen here so the backfill never changes
+GRID_CELL_DEG = 0.0005
+GRID_COLS = int(round(360 / GRID_CELL_DEG))
+GRID_ROWS = int(round(180 / GRID_CELL_DEG))
+
+
+def grid_cell(lat, lon):
+    row = min(max(int(math.floor((lat + 90.0) / GRID_CELL_DEG)), 0), GRID_ROWS - 1)
+    col = int(math.floor((lon + 180.0) / GRID_CELL_DEG)) % GRID_COLS
+    return row * GRID_COLS + col
+
+
+def upgrade():
+    with op.batch_alter_table('pothole', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('grid_cell', sa.BigInteger(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_pothole_grid_cell'), ['grid_cell'], unique=False)
+
+    # backfill existing rows
+    bind = op.get_bind()
+    pothole = sa.table('pothole', sa.column('id', sa.Integer), sa.column('latitude', sa.Float),
+                       sa.column('longitude', sa.Float), sa.column('grid_cell', sa.BigInteger))
+    rows = bind.execute(sa.select(pothole.c.id, pothole.c.latitude, pothole.c.longitude)
+                        .where(pothole.c.latitude.isnot(None), pothole.c.longitude.isnot(None))).all()
+    stmt = (sa.update(pothole).where(pothole.c.id == sa.bindparam('pid'))
+            .values(grid_cell=sa.bindparam('cell')))
+    for i in range(0, len(rows), 5000):
+        bind.execute(stmt, [{'pid': r.id, 'cell': grid_cell(r.latitude, r.longitude)}
+                            for r in rows[i:i + 5000]])
+
+
+def downgrade():
+    with op.batch_alter_table('pothole', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pothole_grid_cell'))
+        batch_op.drop_column('grid_cell')
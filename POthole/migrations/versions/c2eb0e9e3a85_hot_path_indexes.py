@@ -0,0 +1,56 @@
+"""hot path indexes
+
+Revision ID: c2eb0e9e3a85
+Revises: a4c1d174fbb4
+Create Date: 2026-10-18 09:55:27.623668
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2eb0e9e3a85'
+down_revision = 'a4c1d174fbb4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('photo', schema=None) as batch_op:
+        batch_op.create_index('ix_photo_pothole_id_file_hash', ['pothole_id', 'file_hash'], unique=False)
+
+    with op.batch_alter_table('pothole', schema=None) as batch_op:
+        batch_op.create_index('ix_pothole_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_pothole_status_created_at', ['status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('pothole_report', schema=None) as batch_op:
+        batch_op.create_index('ix_pothole_report_reporter_id_created_at', ['reporter_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('wallet_transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_wallet_transaction_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('work_order', schema=None) as batch_op:
+        batch_op.create_index('ix_work_order_crew_id_status_updated_at', ['crew_id', 'status', 'updated_at'], unique=False)
+        batch_op.create_index('ix_work_order_pothole_id_updated_at', ['pothole_id', 'updated_at'], unique=False)
+        batch_op.create_index('ix_work_order_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('work_order', schema=None) as batch_op:
+        batch_op.drop_index('ix_work_order_updated_at')
+        batch_op.drop_index('ix_work_order_pothole_id_updated_at')
+        batch_op.drop_index('ix_work_order_crew_id_status_updated_at')
+
+    with op.batch_alter_table('wallet_transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_wallet_transaction_user_id_created_at')
+
+    with op.batch_alter_table('pothole_report', schema=None) as batch_op:
+        batch_op.drop_index('ix_pothole_report_reporter_id_created_at')
+
+    with op.batch_alter_table('pothole', schema=None) as batch_op:
+        batch_op.drop_index('ix_pothole_status_created_at')
+        batch_op.drop_index('ix_pothole_created_at')
+
+    with op.batch_alter_table('photo', schema=None) as batch_op:
+        batch_op.drop_index('ix_photo_pothole_id_file_hash')
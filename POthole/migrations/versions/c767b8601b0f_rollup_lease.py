@@ -0,0 +1,26 @@
+"""rollup lease
+
+Revision ID: c767b8601b0f
+Revises: fa3b27c8b02f
+Create Date: 2026-10-18 10:36:43.484917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c767b8601b0f'
+down_revision = 'fa3b27c8b02f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rollup_watermark', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('running_since', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('rollup_watermark', schema=None) as batch_op:
+        batch_op.drop_column('running_since')
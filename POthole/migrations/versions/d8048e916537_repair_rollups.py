@@ -0,0 +1,62 @@
+"""repair rollups
+
+Revision ID: d8048e916537
+Revises: c2eb0e9e3a85
+Create Date: 2026-10-18 10:11:16.743149
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8048e916537'
+down_revision = 'c2eb0e9e3a85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('repair_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=8), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=False),
+    sa.Column('crew_id', sa.Integer(), nullable=False),
+    sa.Column('repairs', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Float(), nullable=False),
+    sa.Column('labor_cost', sa.Float(), nullable=False),
+    sa.Column('material_cost', sa.Float(), nullable=False),
+    sa.Column('equipment_cost', sa.Float(), nullable=False),
+    sa.Column('material_kg', sa.Float(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.Column('repair_seconds', sa.Float(), nullable=False),
+    sa.Column('timed_repairs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period', 'period_start', 'district_id', 'crew_id', name='uq_repair_rollup_bucket')
+    )
+    op.create_table('rollup_contribution',
+    sa.Column('work_order_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=False),
+    sa.Column('crew_id', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Float(), nullable=False),
+    sa.Column('labor_cost', sa.Float(), nullable=False),
+    sa.Column('material_cost', sa.Float(), nullable=False),
+    sa.Column('equipment_cost', sa.Float(), nullable=False),
+    sa.Column('material_kg', sa.Float(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.Column('repair_seconds', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('work_order_id')
+    )
+    op.create_table('rollup_watermark',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermark')
+    op.drop_table('rollup_contribution')
+    op.drop_table('repair_rollup')
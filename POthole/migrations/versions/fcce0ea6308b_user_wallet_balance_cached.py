@@ -0,0 +1,33 @@
+"""user wallet balance cached
+
+Revision ID: fcce0ea6308b
+Revises: b34c081db015
+Create Date: 2026-10-18 10:02:17.318450
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fcce0ea6308b'
+down_revision = 'b34c081db015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('wallet_balance_cached', sa.Float(), server_default='0', nullable=False))
+
+    # seed from the ledger
+    op.execute("""
+        UPDATE "user" SET wallet_balance_cached = COALESCE((
+            SELECT SUM(CASE WHEN wt.type = 'credit' THEN wt.amount ELSE -wt.amount END)
+            FROM wallet_transaction wt WHERE wt.user_id = "user".id), 0)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('wallet_balance_cached')
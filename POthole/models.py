@@ -1,7 +1,9 @@
 ﻿from datetime import datetime
 from extensions import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from services.geo import grid_cell
+from services import passwords
 
 class TimestampMixin:
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -19,17 +21,20 @@ class User(UserMixin, TimestampMixin, db.Model):
     phone = db.Column(db.String(32))
     role = db.Column(db.String(20), default="citizen")  # citizen/staff/lead/admin
     password_hash = db.Column(db.String(255))
+    # running total of the wallet ledger; kept in step by services.wallet
+    wallet_balance_cached = db.Column(db.Float, nullable=False, default=0, server_default="0")
 
-    def set_password(self, pw): self.password_hash = generate_password_hash(pw)
-    def check_password(self, pw): return check_password_hash(self.password_hash, pw)
+    def set_password(self, pw): self.password_hash = passwords.hash_password(pw)
+    def check_password(self, pw): return passwords.verify(self.password_hash, pw)
+    def password_needs_rehash(self): return passwords.needs_rehash(self.password_hash)
 
     @property
     def wallet_balance(self):
-        from sqlalchemy.sql import func, case
-        total = db.session.query(
-            func.coalesce(func.sum(case((WalletTransaction.type=="credit", WalletTransaction.amount), else_=-WalletTransaction.amount)), 0)
-        ).filter(WalletTransaction.user_id==self.id).scalar()
-        return float(total or 0)
+        return float(self.wallet_balance_cached or 0)
+
+# login matches email or name case-insensitively (auth.login, auth.register)
+db.Index("ix_user_email_lower", db.func.lower(User.email))
+db.Index("ix_user_name_lower", db.func.lower(User.name))
 
 class Crew(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -51,12 +56,15 @@ class CrewMembership(db.Model):
 # (Team/TeamMembership can stay if you already added them; they won’t break anything.)
 
 class Pothole(TimestampMixin, db.Model):
+    __table_args__ = (db.Index("ix_pothole_created_at", "created_at"),
+                      db.Index("ix_pothole_status_created_at", "status", "created_at"))
     id = db.Column(db.Integer, primary_key=True)
     public_id = db.Column(db.String(16), unique=True, index=True)
     street_address = db.Column(db.String(255), nullable=False)
     address_norm = db.Column(db.String(255), index=True)
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
+    grid_cell = db.Column(db.BigInteger, index=True)  # services.geo.grid_cell(latitude, longitude)
     size_1_10 = db.Column(db.Integer, nullable=False)
     location_type = db.Column(db.String(30))  # middle/curb/edge
     district_id = db.Column(db.Integer, db.ForeignKey("district.id"))
@@ -71,7 +79,22 @@ class Pothole(TimestampMixin, db.Model):
     photos = db.relationship("Photo", backref="pothole", lazy="dynamic", cascade="all, delete-orphan")
     reports = db.relationship("PotholeReport", backref="pothole", lazy="dynamic", cascade="all, delete-orphan")
 
+@event.listens_for(Pothole, "before_insert")
+@event.listens_for(Pothole, "before_update")
+def _sync_grid_cell(mapper, connection, target):
+    target.grid_cell = grid_cell(target.latitude, target.longitude)
+
+@event.listens_for(Pothole, "after_update")
+def _touch_work_orders_on_district_change(mapper, connection, target):
+    # repair rollups are keyed by district but only rescan work orders by updated_at
+    if db.inspect(target).attrs.district_id.history.has_changes():
+        connection.execute(WorkOrder.__table__.update().where(WorkOrder.__table__.c.pothole_id == target.id)
+                           .values(updated_at=datetime.utcnow()))
+
 class WorkOrder(TimestampMixin, db.Model):
+    __table_args__ = (db.Index("ix_work_order_crew_id_status_updated_at", "crew_id", "status", "updated_at"),
+                      db.Index("ix_work_order_pothole_id_updated_at", "pothole_id", "updated_at"),
+                      db.Index("ix_work_order_updated_at", "updated_at"))
     id = db.Column(db.Integer, primary_key=True)
     pothole_id = db.Column(db.Integer, db.ForeignKey("pothole.id"), nullable=False)
     crew_id = db.Column(db.Integer, db.ForeignKey("crew.id"))
@@ -89,6 +112,7 @@ class WorkOrder(TimestampMixin, db.Model):
     notes = db.Column(db.Text)
 
 class Photo(TimestampMixin, db.Model):
+    __table_args__ = (db.Index("ix_photo_pothole_id_file_hash", "pothole_id", "file_hash"),)
     id = db.Column(db.Integer, primary_key=True)
     pothole_id = db.Column(db.Integer, db.ForeignKey("pothole.id"), nullable=False)
     reporter_id = db.Column(db.Integer, db.ForeignKey("user.id"))
@@ -96,6 +120,7 @@ class Photo(TimestampMixin, db.Model):
     file_hash = db.Column(db.String(64), index=True)
 
 class PotholeReport(TimestampMixin, db.Model):
+    __table_args__ = (db.Index("ix_pothole_report_reporter_id_created_at", "reporter_id", "created_at"),)
     id = db.Column(db.Integer, primary_key=True)
     pothole_id = db.Column(db.Integer, db.ForeignKey("pothole.id"), nullable=False)
     reporter_id = db.Column(db.Integer, db.ForeignKey("user.id"))
@@ -104,6 +129,7 @@ class PotholeReport(TimestampMixin, db.Model):
     photo_count = db.Column(db.Integer, default=0)
 
 class WalletTransaction(TimestampMixin, db.Model):
+    __table_args__ = (db.Index("ix_wallet_transaction_user_id_created_at", "user_id", "created_at"),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     amount = db.Column(db.Float, nullable=False)
@@ -117,4 +143,67 @@ class Issue(TimestampMixin, db.Model):
     reporter_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     title = db.Column(db.String(200))
     body = db.Column(db.Text)
-    status = db.Column(db.String(20), default="open")
+    status = db.Column(db.String(20), default="open")
+
+class CostRate(TimestampMixin, db.Model):
+    """Hourly labor rate per person; NULL district/crew means "any" (see services/cost.py)."""
+    __table_args__ = (db.UniqueConstraint("district_id", "crew_id", name="uq_cost_rate_scope"),)
+    id = db.Column(db.Integer, primary_key=True)
+    district_id = db.Column(db.Integer, db.ForeignKey("district.id"))
+    crew_id = db.Column(db.Integer, db.ForeignKey("crew.id"))
+    hourly_rate_per_person = db.Column(db.Float, nullable=False)
+
+# --- reporting rollups (maintained by services/analytics.py) ---
+class RepairRollup(db.Model):
+    """Completed repairs aggregated per day or week, district and crew (0 = none)."""
+    __table_args__ = (db.UniqueConstraint("period", "period_start", "district_id", "crew_id",
+                                          name="uq_repair_rollup_bucket"),)
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(8), nullable=False)        # day|week
+    period_start = db.Column(db.Date, nullable=False)
+    district_id = db.Column(db.Integer, nullable=False, default=0)
+    crew_id = db.Column(db.Integer, nullable=False, default=0)
+    repairs = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0)
+    labor_cost = db.Column(db.Float, nullable=False, default=0)
+    material_cost = db.Column(db.Float, nullable=False, default=0)
+    equipment_cost = db.Column(db.Float, nullable=False, default=0)
+    material_kg = db.Column(db.Float, nullable=False, default=0)
+    hours = db.Column(db.Float, nullable=False, default=0)
+    repair_seconds = db.Column(db.Float, nullable=False, default=0)   # sum of report -> repair times
+    timed_repairs = db.Column(db.Integer, nullable=False, default=0)  # repairs counted in repair_seconds
+
+class RollupContribution(db.Model):
+    """What one completed work order currently adds to the rollups, so changes can be diffed."""
+    work_order_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    district_id = db.Column(db.Integer, nullable=False, default=0)
+    crew_id = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0)
+    labor_cost = db.Column(db.Float, nullable=False, default=0)
+    material_cost = db.Column(db.Float, nullable=False, default=0)
+    equipment_cost = db.Column(db.Float, nullable=False, default=0)
+    material_kg = db.Column(db.Float, nullable=False, default=0)
+    hours = db.Column(db.Float, nullable=False, default=0)
+    repair_seconds = db.Column(db.Float)
+
+class RollupWatermark(db.Model):
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.DateTime, nullable=False)
+    running_since = db.Column(db.DateTime)   # lease held by the refresh in progress, if any
+
+# --- background tasks (run by services/tasks.py) ---
+class Task(TimestampMixin, db.Model):
+    """One queued side effect; ``key`` makes enqueueing the same work twice a no-op."""
+    __table_args__ = (db.Index("ix_task_status_run_at", "status", "run_at"),)
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable=False)
+    key = db.Column(db.String(128), nullable=False, unique=True)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(10), nullable=False, default="queued")  # queued|running|done|failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
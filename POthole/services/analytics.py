@@ -0,0 +1,247 @@
+"""Repair throughput and cost rollups, refreshed incrementally.
+
+RepairRollup holds one row per (day|week, district, crew) with the sums the
+analytics page needs. refresh_rollups() reads only work orders whose
+updated_at is at or after the stored watermark, works out what each one
+should now contribute (nothing unless it is completed), diffs that against
+RollupContribution and applies the difference to the buckets. Re-reading a
+row therefore changes nothing, which is what makes the ">=" watermark and the
+short safety lag (for transactions that commit a little after stamping
+updated_at) safe. A reopened work order is re-read like any other change and
+its contribution backed out; one that was deleted can't be re-read, so each
+refresh also backs out contributions whose work order no longer exists. Run
+it from cron with ``flask analytics refresh``.
+
+Buckets are updated by adding deltas, so two refreshes must never diff the
+same rows at once. Each run takes a lease on the watermark row (a conditional
+UPDATE of running_since), renews it with every chunk it commits and gives it
+up when done; a second run meanwhile raises RefreshInProgress. A run that
+dies holding the lease is taken over after ROLLUP_LEASE_S.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Pothole, WorkOrder, RepairRollup, RollupContribution, RollupWatermark
+
+WATERMARK = "repair_rollup"
+MEASURES = ("total_cost", "labor_cost", "material_cost", "equipment_cost", "material_kg", "hours")
+PERIODS = ("day", "week")
+
+class RefreshInProgress(RuntimeError):
+    """Another refresh holds the rollup lease."""
+
+def period_start(day, period):
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+def _contribution(r):
+    """The row a work order should have in RollupContribution, or None."""
+    if r.status != "completed":
+        return None
+    done = r.end_at or r.updated_at
+    seconds = (done - r.reported_at).total_seconds() if r.reported_at and done >= r.reported_at else None
+    return dict(work_order_id=r.id, day=done.date(), district_id=r.district_id or 0, crew_id=r.crew_id or 0,
+                total_cost=r.total_cost or 0, labor_cost=r.labor_cost or 0, material_cost=r.material_cost or 0,
+                equipment_cost=r.equipment_cost or 0, material_kg=r.filler_material_kg or 0,
+                hours=r.hours_applied or 0, repair_seconds=seconds)
+
+def _stored(c):
+    """A RollupContribution row as the dict _contribution() would have built."""
+    return {k: getattr(c, k) for k in ("day", "district_id", "crew_id", *MEASURES, "repair_seconds")}
+
+def _add(deltas, c, sign):
+    for period in PERIODS:
+        d = deltas[(period, period_start(c["day"], period), c["district_id"], c["crew_id"])]
+        d["repairs"] += sign
+        for m in MEASURES:
+            d[m] += sign * c[m]
+        if c["repair_seconds"] is not None:
+            d["repair_seconds"] += sign * c["repair_seconds"]
+            d["timed_repairs"] += sign
+
+def _apply(deltas):
+    """Add deltas to their buckets: one SELECT for the keys, then batched UPDATEs and INSERTs."""
+    if not deltas:
+        return
+    cols = ("repairs", *MEASURES, "repair_seconds", "timed_repairs")
+    keys = list(deltas)
+    existing = {}
+    for period in PERIODS:
+        starts = {k[1] for k in keys if k[0] == period}
+        if starts:
+            for row in db.session.execute(
+                    db.select(RepairRollup.id, RepairRollup.period_start, RepairRollup.district_id, RepairRollup.crew_id)
+                    .where(RepairRollup.period == period, RepairRollup.period_start.in_(starts))):
+                existing[(period, row.period_start, row.district_id, row.crew_id)] = row.id
+    updates = [dict({f"d_{c}": deltas[k][c] for c in cols}, b_id=existing[k]) for k in keys if k in existing]
+    inserts = [dict(period=k[0], period_start=k[1], district_id=k[2], crew_id=k[3], **{c: deltas[k][c] for c in cols})
+               for k in keys if k not in existing]
+    if updates:
+        table = RepairRollup.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam("b_id"))
+            .values({c: table.c[c] + db.bindparam(f"d_{c}") for c in cols}), updates)
+    if inserts:
+        db.session.execute(db.insert(RepairRollup), inserts)
+
+def _acquire():
+    """Take the rollup lease and commit; returns its token (the running_since value)."""
+    if db.session.get(RollupWatermark, WATERMARK) is None:
+        db.session.add(RollupWatermark(name=WATERMARK, value=datetime.min))
+        try:
+            db.session.commit()
+        except IntegrityError:                  # another run created it first
+            db.session.rollback()
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config.get("ROLLUP_LEASE_S", 600))
+    taken = db.session.execute(
+        db.update(RollupWatermark)
+        .where(RollupWatermark.name == WATERMARK,
+               or_(RollupWatermark.running_since.is_(None), RollupWatermark.running_since < now - lease))
+        .values(running_since=now).execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    if not taken:
+        raise RefreshInProgress("another rollup refresh is running")
+    return now
+
+def _renew(token, **values):
+    """Move the lease to a new token in the current transaction, failing if it was taken over."""
+    values.setdefault("running_since", datetime.utcnow())
+    if not db.session.execute(
+            db.update(RollupWatermark)
+            .where(RollupWatermark.name == WATERMARK, RollupWatermark.running_since == token)
+            .values(**values).execution_options(synchronize_session=False)).rowcount:
+        db.session.rollback()
+        raise RefreshInProgress("rollup lease was taken over by another refresh")
+    return values["running_since"]
+
+def _release(token):
+    db.session.rollback()
+    db.session.execute(db.update(RollupWatermark)
+                       .where(RollupWatermark.name == WATERMARK, RollupWatermark.running_since == token)
+                       .values(running_since=None).execution_options(synchronize_session=False))
+    db.session.commit()
+
+def refresh_rollups(chunk_size=2000):
+    """Fold work orders changed since the watermark into the rollups and commit.
+
+    Returns the number of work orders examined; raises RefreshInProgress if
+    another refresh is running.
+    """
+    token = _acquire()
+    try:
+        return _refresh(token, chunk_size)
+    except BaseException:
+        _release(token)
+        raise
+
+def _refresh(token, chunk_size):
+    """The body of refresh_rollups, run while holding the lease; gives it up at the end."""
+    lag = timedelta(seconds=current_app.config.get("ROLLUP_WATERMARK_LAG_S", 60))
+    started = datetime.utcnow()
+    since = db.session.scalar(db.select(RollupWatermark.value).where(RollupWatermark.name == WATERMARK))
+    q = (db.select(WorkOrder.id, WorkOrder.status, WorkOrder.crew_id, WorkOrder.end_at, WorkOrder.updated_at,
+                   WorkOrder.total_cost, WorkOrder.labor_cost, WorkOrder.material_cost, WorkOrder.equipment_cost,
+                   WorkOrder.filler_material_kg, WorkOrder.hours_applied,
+                   Pothole.district_id, Pothole.created_at.label("reported_at"))
+         .join(Pothole, Pothole.id == WorkOrder.pothole_id)
+         .order_by(WorkOrder.updated_at, WorkOrder.id))
+    seen, newest, after = 0, since, None
+    while True:
+        page = q.where(WorkOrder.updated_at >= since)
+        if after is not None:
+            page = page.where(tuple_(WorkOrder.updated_at, WorkOrder.id) > after)
+        rows = db.session.execute(page.limit(chunk_size)).all()
+        if not rows:
+            break
+        ids = [r.id for r in rows]
+        old = {c.work_order_id: c for c in
+               RollupContribution.query.filter(RollupContribution.work_order_id.in_(ids))}
+        deltas = defaultdict(lambda: defaultdict(float))
+        fresh = []
+        for r in rows:
+            new = _contribution(r)
+            prev = old.get(r.id)
+            if prev is not None:
+                _add(deltas, _stored(prev), -1)
+            if new is not None:
+                _add(deltas, new, +1)
+                fresh.append(new)
+        _apply({k: v for k, v in deltas.items() if any(abs(x) > 1e-9 for x in v.values())})
+        db.session.execute(db.delete(RollupContribution).where(RollupContribution.work_order_id.in_(ids)))
+        if fresh:
+            db.session.execute(db.insert(RollupContribution), fresh)
+        seen += len(rows)
+        newest = max(newest, rows[-1].updated_at)
+        after = (rows[-1].updated_at, rows[-1].id)
+        token = _renew(token)
+        db.session.commit()
+    # deleted work orders: back out what they still contribute
+    gone_q = (db.select(RollupContribution)
+              .where(~db.select(WorkOrder.id).where(WorkOrder.id == RollupContribution.work_order_id).exists())
+              .order_by(RollupContribution.work_order_id).limit(chunk_size))
+    while True:
+        gone = db.session.scalars(gone_q).all()
+        if not gone:
+            break
+        deltas = defaultdict(lambda: defaultdict(float))
+        for c in gone:
+            _add(deltas, _stored(c), -1)
+        _apply(deltas)
+        db.session.execute(db.delete(RollupContribution)
+                           .where(RollupContribution.work_order_id.in_([c.work_order_id for c in gone])))
+        seen += len(gone)
+        token = _renew(token)
+        db.session.commit()
+    value = min(newest, started - lag) if newest > since else since
+    _renew(token, running_since=None, value=value)
+    db.session.commit()
+    return seen
+
+def rebuild_rollups():
+    """Drop all rollup state and recompute from scratch."""
+    token = _acquire()
+    try:
+        db.session.execute(db.delete(RepairRollup))
+        db.session.execute(db.delete(RollupContribution))
+        token = _renew(token, value=datetime.min)
+        db.session.commit()
+        return _refresh(token, 2000)
+    except BaseException:
+        _release(token)
+        raise
+
+def rollup_report(period="week", since=None, district_id=None, crew_id=None, group_by=None, per_period=True):
+    """Summed rollup rows, newest period first.
+
+    group_by ("district" or "crew") splits each period by that key; with
+    per_period=False the whole range is summed into one row per key.
+    """
+    cols = [func.sum(getattr(RepairRollup, c)).label(c)
+            for c in ("repairs", *MEASURES, "repair_seconds", "timed_repairs")]
+    keys = [RepairRollup.period_start] if per_period else []
+    if group_by == "district":
+        keys.append(RepairRollup.district_id)
+    elif group_by == "crew":
+        keys.append(RepairRollup.crew_id)
+    q = db.select(*keys, *cols).where(RepairRollup.period == period).group_by(*keys)
+    if since is not None:
+        q = q.where(RepairRollup.period_start >= period_start(since, period))
+    if district_id is not None:
+        q = q.where(RepairRollup.district_id == district_id)
+    if crew_id is not None:
+        q = q.where(RepairRollup.crew_id == crew_id)
+    out = []
+    order = [RepairRollup.period_start.desc(), *keys[1:]] if per_period else keys
+    for r in db.session.execute(q.order_by(*order)):
+        row = {"repairs": int(r.repairs or 0),
+               **{m: round(getattr(r, m) or 0, 2) for m in MEASURES},
+               "mean_hours_to_repair": round(r.repair_seconds / r.timed_repairs / 3600, 1) if r.timed_repairs else None}
+        if per_period:
+            row["period_start"] = r.period_start.isoformat()
+        if group_by:
+            row[f"{group_by}_id"] = getattr(r, f"{group_by}_id")
+        out.append(row)
+    return out
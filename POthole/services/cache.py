@@ -0,0 +1,121 @@
+"""Small TTL cache with a pluggable backend and commit-time invalidation.
+
+The default backend keeps values in-process (one copy per worker). Set
+CACHE_BACKEND to "null" to disable caching, or to an import path such as
+"mypkg.cache:RedisBackend" for a shared store; the factory is called with
+the app and must provide get/set/delete/clear like LocalBackend.
+"""
+import threading, time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.utils import import_string
+
+MISSING = object()
+
+class LocalBackend:
+    def __init__(self, app=None):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None: return MISSING
+            if hit[0] < time.monotonic():
+                del self._data[key]; return MISSING
+            return hit[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, *keys):
+        with self._lock:
+            for k in keys: self._data.pop(k, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class NullBackend:
+    def __init__(self, app=None): pass
+    def get(self, key): return MISSING
+    def set(self, key, value, ttl): pass
+    def delete(self, *keys): pass
+    def clear(self): pass
+
+_BACKENDS = {"local": LocalBackend, "null": NullBackend}
+
+class Cache:
+    def __init__(self, app=None):
+        self.backend = LocalBackend()
+        self.default_ttl = 30
+        self._watch = {}          # (mapped class, "insert"|"update"|"delete") -> keys dropped on that change
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get("CACHE_BACKEND", "local")
+        factory = _BACKENDS.get(name) or import_string(name)
+        self.backend = factory(app)
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", 30)
+        if not self._listening:
+            event.listen(Session, "after_flush", self._collect_flush)
+            event.listen(Session, "do_orm_execute", self._collect_bulk)
+            event.listen(Session, "after_commit", self._flush_pending)
+            event.listen(Session, "after_rollback", self._drop_pending)
+            self._listening = True
+
+    def get(self, key, default=None):
+        value = self.backend.get(key)
+        return default if value is MISSING else value
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, fn, ttl=None):
+        value = self.backend.get(key)
+        if value is MISSING:
+            value = fn()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate_on(self, *models, keys, changes=("insert", "update", "delete")):
+        """Drop ``keys`` whenever a transaction that makes one of ``changes`` to any of ``models`` commits.
+
+        Pass changes=("insert", "delete") for values that only count rows.
+        """
+        for m in models:
+            for change in changes:
+                self._watch.setdefault((m, change), set()).update(keys)
+
+    # --- session hooks ---
+    def _pending(self, session):
+        return session.info.setdefault("cache_invalidate", set())
+
+    def _collect_flush(self, session, flush_context):
+        touched = {*((type(o), "insert") for o in session.new), *((type(o), "update") for o in session.dirty),
+                   *((type(o), "delete") for o in session.deleted)}
+        for k in touched & self._watch.keys():
+            self._pending(session).update(self._watch[k])
+
+    def _collect_bulk(self, state):
+        # ORM bulk insert/update/delete statements skip the flush
+        change = "insert" if state.is_insert else "update" if state.is_update else "delete" if state.is_delete else None
+        if change and state.bind_mapper is not None:
+            keys = self._watch.get((state.bind_mapper.class_, change))
+            if keys: self._pending(state.session).update(keys)
+
+    def _flush_pending(self, session):
+        keys = session.info.pop("cache_invalidate", None)
+        if keys: self.delete(*keys)
+
+    def _drop_pending(self, session):
+        session.info.pop("cache_invalidate", None)
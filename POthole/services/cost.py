@@ -1,5 +1,98 @@
-def compute_cost(hours: float, people: int, hourly_rate_per_person: float,
-                 material_cost: float, equipment_cost: float) -> dict:
-    labor_cost = hours * people * hourly_rate_per_person
-    total = labor_cost + material_cost + equipment_cost
-    return {"labor_cost": labor_cost, "total_cost": total}
+"""Work order pricing.
+
+labor = hours * max(people, 1) * hourly rate per person, and total = labor +
+material + equipment. The hourly rate comes from the cost_rate table, most
+specific match first: district + crew, then crew, then district, then
+DEFAULT_HOURLY_RATE. The table is small and read on every save, so it is
+cached and dropped whenever a CostRate row commits.
+
+recompute_costs() re-prices historical work orders after a rate change. It
+reads plain columns a chunk at a time, prices each chunk with numpy and
+writes back only the rows whose cost moved.
+"""
+import numpy as np
+from flask import current_app
+from extensions import db, cache
+from models import CostRate, Pothole, WorkOrder
+
+RATES_KEY = "cost:rates"
+cache.invalidate_on(CostRate, keys=[RATES_KEY])
+
+def compute_cost(hours: float, people: int, hourly_rate_per_person: float,
+                 material_cost: float, equipment_cost: float) -> dict:
+    labor_cost = (hours or 0) * max(people or 0, 1) * hourly_rate_per_person
+    total = labor_cost + (material_cost or 0) + (equipment_cost or 0)
+    return {"labor_cost": labor_cost, "total_cost": total}
+
+def _load_rates():
+    return {(r.district_id, r.crew_id): r.hourly_rate_per_person
+            for r in db.session.execute(db.select(CostRate.district_id, CostRate.crew_id,
+                                                  CostRate.hourly_rate_per_person))}
+
+def rate_table():
+    """{(district_id or None, crew_id or None): hourly rate}."""
+    return cache.get_or_set(RATES_KEY, _load_rates)
+
+def hourly_rate(district_id, crew_id, rates=None):
+    rates = rate_table() if rates is None else rates
+    for key in ((district_id, crew_id), (None, crew_id), (district_id, None)):
+        if key in rates and (key[0] is not None or key[1] is not None):
+            return rates[key]
+    return rates.get((None, None), current_app.config.get("DEFAULT_HOURLY_RATE", 30.0))
+
+def price_work_order(wo, district_id):
+    """Set wo.labor_cost / wo.total_cost from its hours, people and the rate table."""
+    cost = compute_cost(wo.hours_applied, wo.people_used, hourly_rate(district_id, wo.crew_id),
+                        wo.material_cost, wo.equipment_cost)
+    wo.labor_cost = cost["labor_cost"]
+    wo.total_cost = cost["total_cost"]
+    return wo
+
+def set_rate(rate, district_id=None, crew_id=None):
+    row = CostRate.query.filter_by(district_id=district_id, crew_id=crew_id).first()
+    if row is None:
+        row = CostRate(district_id=district_id, crew_id=crew_id)
+        db.session.add(row)
+    row.hourly_rate_per_person = rate
+    return row
+
+def recompute_costs(dry_run=False, chunk_size=5000, tolerance=0.005):
+    """Re-price every work order with the current rates; commits per chunk unless dry_run.
+
+    Returns {"examined", "changed", "labor_delta", "total_delta"}.
+    """
+    rates = _load_rates()
+    q = (db.select(WorkOrder.id, WorkOrder.crew_id, Pothole.district_id, WorkOrder.hours_applied,
+                   WorkOrder.people_used, WorkOrder.material_cost, WorkOrder.equipment_cost,
+                   WorkOrder.labor_cost, WorkOrder.total_cost)
+         .join(Pothole, Pothole.id == WorkOrder.pothole_id).order_by(WorkOrder.id))
+    table = WorkOrder.__table__
+    write = (table.update().where(table.c.id == db.bindparam("wo_id"))
+             .values(labor_cost=db.bindparam("labor"), total_cost=db.bindparam("total")))
+    out = {"examined": 0, "changed": 0, "labor_delta": 0.0, "total_delta": 0.0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(q.where(WorkOrder.id > last_id).limit(chunk_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        cols = list(zip(*rows))
+        f = lambda i: np.array([0.0 if v is None else v for v in cols[i]], dtype=float)
+        hours, people, material, equipment, old_labor, old_total = f(3), f(4), f(5), f(6), f(7), f(8)
+        # one rate lookup per distinct (district, crew) pair in the chunk
+        pairs = [(d, c) for c, d in zip(cols[1], cols[2])]
+        distinct = list(dict.fromkeys(pairs))
+        index = {p: i for i, p in enumerate(distinct)}
+        rate = np.array([hourly_rate(d, c, rates) for d, c in distinct])[[index[p] for p in pairs]]
+        labor = hours * np.maximum(people, 1) * rate
+        total = labor + material + equipment
+        moved = np.flatnonzero((np.abs(labor - old_labor) > tolerance) | (np.abs(total - old_total) > tolerance))
+        out["examined"] += len(rows)
+        out["changed"] += len(moved)
+        out["labor_delta"] += float((labor - old_labor)[moved].sum())
+        out["total_delta"] += float((total - old_total)[moved].sum())
+        if len(moved) and not dry_run:
+            db.session.execute(write, [{"wo_id": cols[0][i], "labor": float(labor[i]), "total": float(total[i])}
+                                       for i in moved])
+            db.session.commit()
+    return out
@@ -0,0 +1,117 @@
+"""Batch dispatch: assign every reported pothole to a crew, High priority first.
+
+Each crew may hold people_count * DISPATCH_ORDERS_PER_PERSON open work
+orders (planned or in_progress), minus what it already has. A crew works
+around an anchor point: the centroid of its open work plus whatever this run
+gives it. Potholes are taken highest priority first (then bigger, then
+older) and go to the nearest crew that still has room. A crew with no open
+work has no anchor yet; it is sent to the first pothole that is more than
+DISPATCH_NEW_ZONE_M from every working crew, which spreads idle crews over
+the outlying clusters instead of stretching the busy ones. Potholes without
+coordinates go to the crew with the most room left.
+"""
+import numpy as np
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, case
+from extensions import db
+from models import Crew, Pothole, WorkOrder
+from services.geo import haversine_many
+
+ACTIVE_STATUSES = ("planned", "in_progress")
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+def _crew_state():
+    """(crew ids, room left, anchor lat, anchor lon, points behind each anchor) arrays."""
+    per_person = current_app.config.get("DISPATCH_ORDERS_PER_PERSON", 2)
+    open_work = (db.select(WorkOrder.crew_id, func.count(WorkOrder.id).label("n"),
+                           func.avg(Pothole.latitude).label("lat"), func.avg(Pothole.longitude).label("lon"),
+                           func.count(Pothole.latitude).label("located"))
+                 .join(Pothole, Pothole.id == WorkOrder.pothole_id)
+                 .where(WorkOrder.status.in_(ACTIVE_STATUSES), WorkOrder.crew_id.isnot(None))
+                 .group_by(WorkOrder.crew_id).subquery())
+    rows = db.session.execute(
+        db.select(Crew.id, Crew.people_count, open_work.c.n, open_work.c.lat, open_work.c.lon, open_work.c.located)
+        .outerjoin(open_work, open_work.c.crew_id == Crew.id).order_by(Crew.id)).all()
+    ids = np.array([r.id for r in rows], dtype=np.int64)
+    room = np.array([max(r.people_count or 1, 1) * per_person - (r.n or 0) for r in rows], dtype=np.int64)
+    lat = np.array([np.nan if r.lat is None else r.lat for r in rows], dtype=float)
+    lon = np.array([np.nan if r.lon is None else r.lon for r in rows], dtype=float)
+    weight = np.array([r.located or 0 for r in rows], dtype=float)
+    return ids, room, lat, lon, weight
+
+def _backlog(limit=None):
+    rank = case(PRIORITY_RANK, value=Pothole.priority, else_=len(PRIORITY_RANK))
+    q = (db.select(Pothole.id, Pothole.priority, Pothole.latitude, Pothole.longitude)
+         .where(Pothole.status == "reported")
+         .where(~db.select(WorkOrder.id).where(WorkOrder.pothole_id == Pothole.id,
+                                                WorkOrder.status.in_(ACTIVE_STATUSES)).exists())
+         .order_by(rank, Pothole.size_1_10.desc(), Pothole.created_at, Pothole.id))
+    if limit:
+        q = q.limit(limit)
+    return db.session.execute(q).all()
+
+def plan_dispatch(limit=None):
+    """Assignments for the current backlog as dicts, in dispatch order; writes nothing."""
+    new_zone_m = current_app.config.get("DISPATCH_NEW_ZONE_M", 3000)
+    ids, room, alat, alon, weight = _crew_state()
+    plan = []
+    if not len(ids):
+        return plan
+    for p in _backlog(limit):
+        open_ = room > 0
+        if not open_.any():
+            break
+        if p.latitude is None or p.longitude is None:
+            j = int(np.argmax(room)); metres = None
+        else:
+            d = haversine_many(p.latitude, p.longitude, alat, alon)
+            d[~open_ | np.isnan(d)] = np.inf
+            j = int(np.argmin(d)); metres = float(d[j])
+            idle = np.flatnonzero(open_ & np.isnan(alat))
+            if len(idle) and metres > new_zone_m:
+                j = int(idle[np.argmax(room[idle])]); metres = 0.0
+            if np.isinf(metres):
+                j = int(np.argmax(room)); metres = None
+            # move the crew's anchor toward its new stop (running centroid)
+            w = weight[j]
+            alat[j] = p.latitude if w == 0 else (alat[j] * w + p.latitude) / (w + 1)
+            alon[j] = p.longitude if w == 0 else (alon[j] * w + p.longitude) / (w + 1)
+            weight[j] = w + 1
+        room[j] -= 1
+        plan.append({"pothole_id": p.id, "crew_id": int(ids[j]), "priority": p.priority,
+                     "metres": None if metres is None else round(metres, 1)})
+    return plan
+
+def apply_dispatch(plan, chunk_size=500):
+    """Create the planned work orders and mark their potholes in_progress.
+
+    Work orders get the same fields as one created by hand on the staff
+    pothole page: status "planned" and start_at now.
+
+    Potholes that left "reported" since the plan was made are skipped. Runs
+    in the caller's transaction; the caller commits. Returns the assignments
+    actually made.
+    """
+    crew_of = {a["pothole_id"]: a["crew_id"] for a in plan}
+    ids = list(crew_of)
+    made, now = [], datetime.utcnow()
+    for i in range(0, len(ids), chunk_size):
+        moved = db.session.execute(
+            db.update(Pothole).where(Pothole.id.in_(ids[i:i + chunk_size]), Pothole.status == "reported")
+            .values(status="in_progress").returning(Pothole.id)).scalars().all()
+        if moved:
+            db.session.execute(db.insert(WorkOrder), [
+                {"pothole_id": pid, "crew_id": crew_of[pid], "status": "planned", "start_at": now} for pid in moved])
+            made += moved
+    made = set(made)
+    return [a for a in plan if a["pothole_id"] in made]
+
+def summarize(plan):
+    """{crew_id: {"orders": n, "High": n, ...}} for reporting."""
+    out = {}
+    for a in plan:
+        row = out.setdefault(a["crew_id"], {"orders": 0})
+        row["orders"] += 1
+        row[a["priority"]] = row.get(a["priority"], 0) + 1
+    return out
@@ -0,0 +1,73 @@
+"""Engine profile: connection pool options and SQLite PRAGMAs.
+
+Both are empty in Config, so development, tests and in-memory databases get
+SQLAlchemy's and SQLite's defaults; ProductionConfig (APP_ENV=production)
+fills them in.
+
+DB_POOL holds pool settings for create_engine. pool_size, max_overflow and
+pool_timeout only mean something to a QueuePool, so they go only to URLs
+that get one (anything but an in-memory SQLite database); pool_recycle and
+pool_pre_ping apply to every engine. Binds given as plain URLs are treated
+the same way. init_app must run before db.init_app, which creates the
+engines.
+
+SQLITE_PRAGMAS are run on every new SQLite connection:
+
+  * journal_mode=WAL lets readers keep going while one writer commits,
+    instead of everyone seeing "database is locked";
+  * synchronous=NORMAL syncs at checkpoints rather than on every commit,
+    which is safe in WAL mode (a power cut can lose the last commits, not
+    corrupt the file);
+  * busy_timeout makes a writer wait for the lock instead of failing;
+  * mmap_size lets SQLite read pages straight from the page cache.
+"""
+import sqlite3
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+QUEUE_POOL_ONLY = ("pool_size", "max_overflow", "pool_timeout")
+
+def uses_queue_pool(url):
+    """False for in-memory SQLite, which Flask-SQLAlchemy gives a StaticPool."""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return True
+    return url.database not in (None, "", ":memory:") and url.query.get("mode") != "memory"
+
+def pool_options(url, pool):
+    return {k: v for k, v in pool.items() if k not in QUEUE_POOL_ONLY or uses_queue_pool(url)}
+
+class EngineTuning:
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        pool = dict(app.config.get("DB_POOL") or {})
+        if pool:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+                **pool_options(app.config["SQLALCHEMY_DATABASE_URI"], pool),
+                **(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})}
+            # binds don't inherit SQLALCHEMY_ENGINE_OPTIONS
+            app.config["SQLALCHEMY_BINDS"] = {
+                key: {"url": bind, **pool_options(bind, pool)} if isinstance(bind, str) else bind
+                for key, bind in (app.config.get("SQLALCHEMY_BINDS") or {}).items()}
+        if not self._listening:
+            event.listen(Engine, "connect", self._on_connect)
+            self._listening = True
+
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection) or not has_app_context():
+            return
+        pragmas = current_app.config.get("SQLITE_PRAGMAS") or {}
+        if not pragmas:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
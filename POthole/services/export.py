@@ -0,0 +1,62 @@
+"""Streaming CSV / NDJSON export of potholes, work orders and wallet transactions.
+
+Rows are fetched as plain column tuples with yield_per (a server-side
+cursor where the driver supports it) and encoded a batch at a time, so a
+million-row export runs in constant memory. ``updated_since`` limits the
+export to rows whose TimestampMixin.updated_at is newer than the given
+time, for incremental pulls.
+"""
+import csv, io, json
+from datetime import date, datetime
+from extensions import db
+from models import Pothole, WorkOrder, WalletTransaction
+
+EXPORTS = {
+    "potholes": (Pothole, ["id", "public_id", "street_address", "address_norm", "latitude", "longitude",
+                           "size_1_10", "location_type", "district_id", "priority", "status",
+                           "created_at", "updated_at"]),
+    "work_orders": (WorkOrder, ["id", "pothole_id", "crew_id", "status", "start_at", "end_at",
+                                "hours_applied", "people_used", "filler_material_kg", "material_cost",
+                                "equipment_cost", "labor_cost", "total_cost", "created_at", "updated_at"]),
+    "wallet_transactions": (WalletTransaction, ["id", "user_id", "amount", "type", "description",
+                                                "ref_report_id", "created_at", "updated_at"]),
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+BATCH = 1000
+
+def iter_rows(entity, updated_since=None, batch=BATCH):
+    model, columns = EXPORTS[entity]
+    stmt = db.select(*[getattr(model, c) for c in columns])
+    if updated_since is not None:
+        # incremental pulls come back oldest change first, so the last row is the next watermark
+        stmt = stmt.where(model.updated_at > updated_since).order_by(model.updated_at, model.id)
+    else:
+        stmt = stmt.order_by(model.id)
+    yield from db.session.execute(stmt.execution_options(yield_per=batch))
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+def iter_csv(entity, updated_since=None, batch=BATCH):
+    _, columns = EXPORTS[entity]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for n, row in enumerate(iter_rows(entity, updated_since, batch), start=1):
+        writer.writerow([_plain(v) for v in row])
+        if n % batch == 0:
+            yield buf.getvalue(); buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+def iter_ndjson(entity, updated_since=None, batch=BATCH):
+    _, columns = EXPORTS[entity]
+    lines = []
+    for row in iter_rows(entity, updated_since, batch):
+        lines.append(json.dumps({c: _plain(v) for c, v in zip(columns, row)}))
+        if len(lines) >= batch:
+            yield "\n".join(lines) + "\n"; lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def stream(entity, fmt, updated_since=None):
+    return (iter_csv if fmt == "csv" else iter_ndjson)(entity, updated_since)
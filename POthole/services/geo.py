@@ -1,4 +1,5 @@
 ﻿import math, re
+import numpy as np
 
 def normalize_address(addr: str) -> str:
     return re.sub(r"[^a-z0-9 ]+", " ", (addr or "").strip().lower())
@@ -11,3 +12,140 @@ def haversine_m(lat1, lon1, lat2, lon2):
     dl = math.radians(lon2-lon1)
     a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dl/2)**2
     return 2*R*math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+def haversine_many(lat, lon, lats, lons):
+    """Vectorised haversine_m. Inputs broadcast; missing coordinates give NaN."""
+    lat = np.asarray(lat, dtype=float); lon = np.asarray(lon, dtype=float)
+    lats = np.asarray(lats, dtype=float); lons = np.asarray(lons, dtype=float)
+    R = 6371000.0
+    p1, p2 = np.radians(lat), np.radians(lats)
+    dphi = np.radians(lats-lat)
+    dl = np.radians(lons-lon)
+    a = np.sin(dphi/2)**2 + np.cos(p1)*np.cos(p2)*np.sin(dl/2)**2
+    return 2*R*np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+def nearest_within(points, radius_m, candidates=None, chunk_pairs=4_000_000):
+    """Nearest candidate within radius_m of each (lat, lon) in points.
+
+    Returns (index, metres) arrays; index is -1 (and metres NaN) where nothing
+    is in range. Without candidates, points are matched against each other
+    (a point never matches itself). Points are walked in narrow latitude
+    strips, west to east, and each block is only scored against the
+    candidates its bounding box can reach, with at most ~chunk_pairs
+    distances held in memory at once.
+    """
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    same = candidates is None
+    cand = pts if same else np.asarray(candidates, dtype=float).reshape(-1, 2)
+    idx = np.full(len(pts), -1, dtype=np.int64)
+    dist = np.full(len(pts), np.nan)
+    cand_ids = np.flatnonzero(~np.isnan(cand).any(axis=1))
+    cand_ids = cand_ids[np.argsort(cand[cand_ids, 0], kind="stable")]
+    cand_lat = cand[cand_ids, 0]
+    todo = np.flatnonzero(~np.isnan(pts).any(axis=1))
+    if not len(todo) or not len(cand_ids): return idx, dist
+    pad = radius_m / _M_PER_DEG
+    strip = np.floor(pts[todo, 0] / (8 * pad))
+    order = np.lexsort((pts[todo, 1], strip))
+    todo, strip = todo[order], strip[order]
+    strip_end = np.append(np.flatnonzero(np.diff(strip)) + 1, len(todo))
+    i, block = 0, 256
+    while i < len(todo):
+        ids = todo[i:min(i + block, strip_end[np.searchsorted(strip_end, i, "right")])]
+        b = pts[ids]
+        lat_lo, lat_hi = b[:, 0].min() - pad, b[:, 0].max() + pad
+        lon_pad = pad / max(math.cos(math.radians(min(max(abs(lat_lo), abs(lat_hi)), 90.0))), 1e-9)
+        lon_lo, lon_hi = b[:, 1].min() - lon_pad, b[:, 1].max() + lon_pad
+        band = cand_ids[np.searchsorted(cand_lat, lat_lo, "left"):np.searchsorted(cand_lat, lat_hi, "right")]
+        if lon_lo >= -180 and lon_hi <= 180:   # otherwise the window wraps the antimeridian
+            band = band[(cand[band, 1] >= lon_lo) & (cand[band, 1] <= lon_hi)]
+        if len(ids) * len(band) > chunk_pairs and len(ids) > 1:
+            block = len(ids) // 2; continue
+        if len(band):
+            d = haversine_many(b[:, :1], b[:, 1:], cand[band, 0], cand[band, 1])
+            if same: d[ids[:, None] == band[None, :]] = np.inf
+            d[~(d <= radius_m)] = np.inf
+            best = np.argmin(d, axis=1)
+            bd = d[np.arange(len(ids)), best]
+            hit = np.isfinite(bd)
+            idx[ids[hit]] = band[best[hit]]
+            dist[ids[hit]] = bd[hit]
+        i += len(ids)
+        block = min(block * 2, 256)
+    return idx, dist
+
+# --- spatial grid ---------------------------------------------------------
+# Potholes carry an indexed integer grid cell (row-major over a fixed
+# lat/lon grid), so every cell in one grid row is a contiguous integer range
+# and a radius lookup becomes a handful of indexed BETWEEN scans. Past
+# MAX_CELL_RANGES rows (a radius of about 900 m) that turns into one scan over
+# the whole band of rows, with the columns checked on the rows it reads.
+EARTH_R_M = 6371000.0
+GRID_CELL_DEG = 0.0005                      # ~55 m of latitude
+_GRID_COLS = int(round(360 / GRID_CELL_DEG))
+_GRID_ROWS = int(round(180 / GRID_CELL_DEG))
+_M_PER_DEG = EARTH_R_M * math.pi / 180.0
+MAX_CELL_RANGES = 32
+
+def _grid_row(lat):
+    return min(max(int(math.floor((lat + 90.0) / GRID_CELL_DEG)), 0), _GRID_ROWS - 1)
+
+def _grid_col(lon):
+    return int(math.floor((lon + 180.0) / GRID_CELL_DEG)) % _GRID_COLS
+
+def grid_cell(lat, lon):
+    if lat is None or lon is None: return None
+    return _grid_row(lat) * _GRID_COLS + _grid_col(lon)
+
+def cell_ranges(lat, lon, radius_m):
+    """Inclusive (lo, hi) grid_cell ranges covering a circle's bounding box."""
+    if lat is None or lon is None: return []
+    dlat = radius_m / _M_PER_DEG
+    coslat = math.cos(math.radians(lat))
+    dlon = 180.0 if coslat < 1e-9 else min(dlat / coslat, 180.0)
+    rows = range(_grid_row(lat - dlat), _grid_row(lat + dlat) + 1)
+    if dlon >= 180.0:
+        spans = [(0, _GRID_COLS - 1)]
+    else:
+        c0 = _grid_col(lon - dlon); c1 = _grid_col(lon + dlon)
+        spans = [(c0, c1)] if c0 <= c1 else [(c0, _GRID_COLS - 1), (0, c1)]
+    return [(r * _GRID_COLS + a, r * _GRID_COLS + b) for r in rows for a, b in spans]
+
+def covering_ranges(lat, lon, radius_m):
+    """cell_ranges, collapsed to one range over the whole band of rows past MAX_CELL_RANGES."""
+    ranges = cell_ranges(lat, lon, radius_m)
+    if len(ranges) > MAX_CELL_RANGES:
+        return [(ranges[0][0] // _GRID_COLS * _GRID_COLS, max(hi for _, hi in ranges))]
+    return ranges
+
+def merge_ranges(ranges):
+    """The union of inclusive (lo, hi) ranges as sorted, disjoint ranges."""
+    out = []
+    for lo, hi in sorted(ranges):
+        if out and lo <= out[-1][1] + 1:
+            out[-1] = (out[-1][0], max(out[-1][1], hi))
+        else:
+            out.append((lo, hi))
+    return out
+
+def find_nearby(lat, lon, radius_m, query=None):
+    """Every pothole within radius_m of (lat, lon), nearest first, as (pothole, metres)."""
+    from sqlalchemy import and_, or_
+    from models import Pothole
+    ranges = cell_ranges(lat, lon, radius_m)
+    if not ranges: return []
+    if len(ranges) > MAX_CELL_RANGES:
+        first_row = ranges[0][0] // _GRID_COLS
+        cols = [(lo % _GRID_COLS, hi % _GRID_COLS) for lo, hi in ranges if lo // _GRID_COLS == first_row]
+        match = and_(Pothole.grid_cell.between(first_row * _GRID_COLS, max(hi for _, hi in ranges)),
+                     or_(*[(Pothole.grid_cell % _GRID_COLS).between(a, b) for a, b in cols]))
+    else:
+        match = or_(*[Pothole.grid_cell.between(lo, hi) for lo, hi in ranges])
+    q = (query if query is not None else Pothole.query).filter(match)
+    hits = []
+    for p in q:
+        d = haversine_m(lat, lon, p.latitude, p.longitude)
+        if d is not None and d <= radius_m:
+            hits.append((p, d))
+    hits.sort(key=lambda h: h[1])
+    return hits
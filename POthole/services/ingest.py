@@ -0,0 +1,155 @@
+"""Bulk pothole ingestion (sensor vans, partner apps).
+
+Rows are validated and de-duplicated a chunk at a time with the same rules
+as public.report: an existing pothole with the same normalised address, or
+one within DUPLICATE_RADIUS_M, absorbs the row instead of a new insert.
+Each chunk is inserted with one executemany and committed on its own, so a
+bad row only costs its own slot and a failure only rolls back one chunk.
+"""
+import json, uuid
+from functools import lru_cache
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from itertools import islice
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+from models import Pothole
+from services.geo import normalize_address, grid_cell, covering_ranges, merge_ranges, haversine_m, nearest_within
+from services.rules import compute_priority
+
+LOCATION_TYPES = {"middle", "curb", "edge"}
+RANGES_PER_QUERY = 200       # grid_cell BETWEENs per candidate query, well under SQLite's bind limit
+
+def ndjson_rows(stream):
+    """Rows from a newline-delimited JSON stream; undecodable lines come through as ValueError."""
+    for n, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValueError(f"line {n} is not valid JSON")
+
+def validate(raw):
+    """Clean one incoming row; raises ValueError describing the first problem."""
+    if isinstance(raw, ValueError):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError("row must be a JSON object")
+    addr = raw.get("street_address")
+    if not isinstance(addr, str) or not addr.strip():
+        raise ValueError("street_address is required")
+    if len(addr.strip()) > 255:
+        raise ValueError("street_address is too long")
+    try:
+        size = int(raw.get("size_1_10"))
+    except (TypeError, ValueError):
+        raise ValueError("size_1_10 must be an integer")
+    if not 1 <= size <= 10:
+        raise ValueError("size_1_10 must be between 1 and 10")
+    location_type = raw.get("location_type") or "middle"
+    if location_type not in LOCATION_TYPES:
+        raise ValueError(f"location_type must be one of {sorted(LOCATION_TYPES)}")
+    lat, lon = raw.get("latitude"), raw.get("longitude")
+    if (lat is None) != (lon is None):
+        raise ValueError("latitude and longitude go together")
+    if lat is not None:
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            raise ValueError("latitude/longitude must be numbers")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("latitude/longitude out of range")
+    addr = addr.strip()
+    return dict(street_address=addr, address_norm=normalize_address(addr), size_1_10=size,
+                location_type=location_type, latitude=lat, longitude=lon)
+
+def ingest(rows, radius_m=30, chunk_size=500):
+    """Yield one result dict per input row, in input order."""
+    it = enumerate(rows)
+    while True:
+        batch = list(islice(it, chunk_size))
+        if not batch:
+            return
+        try:
+            yield from _ingest_chunk(batch, radius_m)
+        except SQLAlchemyError:
+            db.session.rollback()
+            yield from ({"index": i, "status": "error", "error": "database error, chunk not saved"}
+                        for i, _ in batch)
+
+def _new_public_ids(n):
+    ids = {uuid.uuid4().hex[:8].upper() for _ in range(n)}
+    while True:
+        taken = {pid for (pid,) in db.session.query(Pothole.public_id).filter(Pothole.public_id.in_(ids))}
+        ids -= taken
+        if len(ids) >= n:
+            return list(ids)[:n]
+        ids |= {uuid.uuid4().hex[:8].upper() for _ in range(n - len(ids))}
+
+@lru_cache(maxsize=None)
+def _candidates_in_ranges():
+    """Potholes in RANGES_PER_QUERY grid_cell ranges :lo0-:hi0, :lo1-:hi1, ...
+
+    Built once and reused so it compiles once; callers pad short batches
+    with empty ranges.
+    """
+    t = Pothole.__table__
+    return db.select(t.c.public_id, t.c.latitude, t.c.longitude).where(
+        or_(*[t.c.grid_cell.between(db.bindparam(f"lo{j}"), db.bindparam(f"hi{j}")) for j in range(RANGES_PER_QUERY)]))
+
+def _ingest_chunk(batch, radius_m):
+    results, valid = {}, []
+    for i, raw in batch:
+        try:
+            valid.append((i, validate(raw)))
+        except ValueError as e:
+            results[i] = {"index": i, "status": "error", "error": str(e)}
+
+    # existing potholes: exact address first, then by distance via the grid index
+    norms = {v["address_norm"] for _, v in valid}
+    by_norm = dict(db.session.query(Pothole.address_norm, Pothole.public_id)
+                   .filter(Pothole.address_norm.in_(norms))) if norms else {}
+    located = [(i, v) for i, v in valid if v["latitude"] is not None and v["address_norm"] not in by_norm]
+    near = {}
+    if located:
+        spans = merge_ranges(r for _, v in located for r in covering_ranges(v["latitude"], v["longitude"], radius_m))
+        cand = []
+        for k in range(0, len(spans), RANGES_PER_QUERY):
+            part = spans[k:k + RANGES_PER_QUERY]
+            part += [(1, 0)] * (RANGES_PER_QUERY - len(part))   # empty range: matches nothing
+            params = {f"{end}{j}": x for j, (lo, hi) in enumerate(part) for end, x in (("lo", lo), ("hi", hi))}
+            cand += db.session.execute(_candidates_in_ranges(), params).all()
+        if cand:
+            idx, _ = nearest_within([(v["latitude"], v["longitude"]) for _, v in located], radius_m,
+                                    [(c.latitude, c.longitude) for c in cand])
+            near = {i: cand[k].public_id for (i, _), k in zip(located, idx) if k >= 0}
+
+    # then against rows accepted earlier in this chunk
+    new_rows, seen_norm, seen_cells, seen_keys = [], {}, defaultdict(list), []   # seen_keys: sorted cells
+    public_ids = iter(_new_public_ids(len(valid))) if valid else iter(())
+    for i, v in valid:
+        dup = by_norm.get(v["address_norm"]) or near.get(i) or seen_norm.get(v["address_norm"])
+        if not dup and v["latitude"] is not None:
+            dup = next((pid for lo, hi in covering_ranges(v["latitude"], v["longitude"], radius_m)
+                        for cell in seen_keys[bisect_left(seen_keys, lo):bisect_right(seen_keys, hi)]
+                        for lat, lon, pid in seen_cells[cell]
+                        if haversine_m(v["latitude"], v["longitude"], lat, lon) <= radius_m), None)
+        if dup:
+            results[i] = {"index": i, "status": "duplicate", "public_id": dup}
+            continue
+        row = dict(v, public_id=next(public_ids), priority=compute_priority(v["size_1_10"]),
+                   grid_cell=grid_cell(v["latitude"], v["longitude"]))
+        new_rows.append(row)
+        seen_norm[v["address_norm"]] = row["public_id"]
+        if row["grid_cell"] is not None:
+            if row["grid_cell"] not in seen_cells:
+                insort(seen_keys, row["grid_cell"])
+            seen_cells[row["grid_cell"]].append((v["latitude"], v["longitude"], row["public_id"]))
+        results[i] = {"index": i, "status": "created", "public_id": row["public_id"]}
+
+    if new_rows:
+        db.session.execute(db.insert(Pothole), new_rows)
+    db.session.commit()
+    return [results[i] for i, _ in batch]
@@ -0,0 +1,68 @@
+"""Password hashing with a configurable cost, and optional pooled verification.
+
+PASSWORD_HASH_METHOD is any werkzeug method string ("scrypt:32768:8:1",
+"pbkdf2:sha256:600000", ...). Stored hashes carry the method they were made
+with, so changing the setting never locks anyone out: needs_rehash() spots an
+old hash and auth.login replaces it after the next successful login.
+
+With PASSWORD_VERIFY_WORKERS > 0, verify() runs the hash on a small thread
+pool instead of the request thread. hashlib drops the GIL while hashing, so
+the pool caps how many cores a login storm can take, leaving the rest for
+everything else. At most PASSWORD_VERIFY_WORKERS * 4 verifications are in
+flight; a login that can't get a slot within PASSWORD_VERIFY_TIMEOUT seconds
+gets VerifyBusy and the route answers 503 rather than queueing without bound.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+class VerifyBusy(Exception):
+    """Every verification slot stayed taken for PASSWORD_VERIFY_TIMEOUT."""
+
+def _config(key, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+def method():
+    return _config("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+
+@lru_cache(maxsize=8)
+def _prefix(method):
+    # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"); let it
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+def hash_password(pw):
+    return generate_password_hash(pw, method=method())
+
+def needs_rehash(pwhash):
+    """True when pwhash wasn't made with the configured method and parameters."""
+    return not pwhash or pwhash.split("$", 1)[0] != _prefix(method())
+
+def _pool(workers):
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="passwords")
+            _slots = threading.BoundedSemaphore(workers * 4)
+    return _executor, _slots
+
+def verify(pwhash, pw):
+    if not pwhash:
+        return False
+    workers = _config("PASSWORD_VERIFY_WORKERS", 0)
+    if not workers:
+        return check_password_hash(pwhash, pw)
+    executor, slots = _pool(workers)
+    if not slots.acquire(timeout=_config("PASSWORD_VERIFY_TIMEOUT", 5)):
+        raise VerifyBusy()
+    try:
+        return executor.submit(check_password_hash, pwhash, pw).result()
+    finally:
+        slots.release()
@@ -0,0 +1,133 @@
+"""Per-request SQL instrumentation.
+
+Engine events time every statement; request hooks attach the totals to the
+response as a Server-Timing header and log one JSON line per request. The
+line is logged as a warning (and carries "flags") when the request is slower
+than SLOW_REQUEST_MS, issues more than MAX_QUERIES_PER_REQUEST statements, or
+runs a statement slower than SLOW_QUERY_MS.
+
+``collect()`` records every statement run inside a block, test-client
+requests included; ``assert_max_queries`` turns that into a budget, which
+benchmarks/query_budgets.py holds the hot routes to:
+
+    with query_stats.assert_max_queries(6):
+        client.get("/user/dashboard")
+"""
+import json, threading, time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryLog:
+    """Statements seen while active, as (sql, ms) in execution order."""
+    def __init__(self):
+        self.statements = []
+
+    def record(self, sql, ms):
+        self.statements.append((sql, ms))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.statements)
+
+    def slowest(self, n=3):
+        return sorted(self.statements, key=lambda s: s[1], reverse=True)[:n]
+
+class QueryStats:
+    def __init__(self, app=None):
+        self._local = threading.local()   # stack of QueryLogs opened by collect()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not self._listening:
+            event.listen(Engine, "before_cursor_execute", self._before_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_execute)
+            event.listen(Engine, "handle_error", self._failed_execute)
+            self._listening = True
+        if app.config.get("QUERY_STATS_ENABLED", True):
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+
+    @contextmanager
+    def collect(self):
+        """Record every statement this thread runs inside the block."""
+        log = QueryLog()
+        if not hasattr(self._local, "logs"):
+            self._local.logs = []
+        stack = self._local.logs
+        stack.append(log)
+        try:
+            yield log
+        finally:
+            stack.remove(log)
+
+    @contextmanager
+    def assert_max_queries(self, limit):
+        """Like collect(), then raise AssertionError listing the statements if more than limit ran."""
+        with self.collect() as log:
+            yield log
+        if log.count > limit:
+            listing = "\n".join(f"  {ms:8.2f} ms  {' '.join(sql.split())[:200]}" for sql, ms in log.statements)
+            raise AssertionError(f"expected at most {limit} queries, got {log.count}:\n{listing}")
+
+    # --- engine hooks ---
+    def _logs(self):
+        logs = list(getattr(self._local, "logs", ()))
+        if has_request_context() and "_query_log" in g:
+            logs.append(g._query_log)
+        return logs
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        for log in self._logs():
+            log.record(statement, ms)
+
+    def _failed_execute(self, context):
+        # a statement that raised never reaches after_cursor_execute; drop its start time
+        # so the connection's next statement isn't timed from it
+        stack = context.connection.info.get("query_start") if context.connection is not None else None
+        if stack:
+            ms = (time.perf_counter() - stack.pop()) * 1000
+            for log in self._logs():
+                log.record(context.statement or "", ms)
+
+    # --- request hooks ---
+    def _start_request(self):
+        g._query_log = QueryLog()
+        g._request_start = time.perf_counter()
+
+    def _finish_request(self, response):
+        log = g.pop("_query_log", None)
+        if log is None:
+            return response
+        config = current_app.config
+        total_ms = (time.perf_counter() - g.pop("_request_start")) * 1000
+        response.headers.add("Server-Timing", f'db;dur={log.total_ms:.1f};desc="{log.count} queries"')
+        response.headers.add("Server-Timing", f"app;dur={total_ms:.1f}")
+
+        slow_query_ms = config.get("SLOW_QUERY_MS", 100)
+        flags = []
+        if total_ms > config.get("SLOW_REQUEST_MS", 500): flags.append("slow_request")
+        if log.count > config.get("MAX_QUERIES_PER_REQUEST", 30): flags.append("too_many_queries")
+        if any(ms > slow_query_ms for _, ms in log.statements): flags.append("slow_query")
+        line = {"method": request.method, "path": request.path, "endpoint": request.endpoint,
+                "status": response.status_code, "ms": round(total_ms, 1),
+                "queries": log.count, "db_ms": round(log.total_ms, 1),
+                "slowest": [{"ms": round(ms, 1), "sql": " ".join(sql.split())[:300]}
+                            for sql, ms in log.slowest(3)]}
+        if flags:
+            line["flags"] = flags
+            current_app.logger.warning("request %s", json.dumps(line))
+        else:
+            current_app.logger.info("request %s", json.dumps(line))
+        return response
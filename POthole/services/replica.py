@@ -0,0 +1,94 @@
+"""Route read-only pages to a read replica and everything else to the primary.
+
+Set REPLICA_DATABASE_URL and the replica becomes the "replica" bind. Views
+decorated with ``read_only`` then run their SELECTs against it on GET/HEAD.
+Flushes, bulk writes and non-SELECT statements always go to the primary, and
+so does the rest of a request once it has written anything.
+
+Read-your-writes: after a request commits a write, the browser session is
+stamped. For REPLICA_STICKY_S seconds that session's read-only pages go to
+the primary too, so a user who just reported a pothole sees it even if the
+replica hasn't caught up. Other users may briefly see the replica's lag.
+
+Without a replica configured nothing changes. To try it locally, point
+DATABASE_URL and REPLICA_DATABASE_URL at two SQLite files (or two local
+Postgres databases) and copy the primary over with ``flask replica sync``.
+"""
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+REPLICA = "replica"
+WROTE_AT = "db_wrote_at"
+
+def read_only(view):
+    """Mark a view as safe to serve from the replica."""
+    view.replica_ok = True
+    return view
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and getattr(clause, "is_select", False)
+                and has_request_context() and g.get("db_replica")):
+            engine = self._db.engines.get(REPLICA)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReplicaRouter:
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if REPLICA not in (app.config.get("SQLALCHEMY_BINDS") or {}):
+            return
+        app.before_request(self._choose)
+        if not self._listening:
+            event.listen(OrmSession, "after_flush", self._wrote)
+            event.listen(OrmSession, "do_orm_execute", self._bulk_wrote)
+            event.listen(OrmSession, "after_commit", self._stamp)
+            event.listen(OrmSession, "after_rollback", self._forget)
+            self._listening = True
+
+    def _choose(self):
+        g.db_routing = True
+        view = current_app.view_functions.get(request.endpoint)
+        if not getattr(view, "replica_ok", False) or request.method not in ("GET", "HEAD"):
+            return
+        wrote_at = session.get(WROTE_AT)
+        sticky = current_app.config.get("REPLICA_STICKY_S", 10)
+        g.db_replica = not (wrote_at and time.time() - wrote_at < sticky)
+
+    # --- session hooks ---
+    def _wrote(self, sess, flush_context=None):
+        if has_request_context() and g.get("db_routing"):
+            g.db_replica = False
+            sess.info["replica_wrote"] = True
+
+    def _bulk_wrote(self, state):
+        if state.is_insert or state.is_update or state.is_delete:
+            self._wrote(state.session)
+
+    def _stamp(self, sess):
+        if sess.info.pop("replica_wrote", None) and has_request_context():
+            session[WROTE_AT] = time.time()
+
+    def _forget(self, sess):
+        sess.info.pop("replica_wrote", None)
+
+def sync_sqlite(db):
+    """Copy the primary SQLite database over the replica (local testing only)."""
+    primary, replica = db.engines[None], db.engines[REPLICA]
+    if primary.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+        raise ValueError("sync only copies SQLite files; use the database's own replication otherwise")
+    replica.dispose()
+    src, dst = primary.raw_connection(), replica.raw_connection()
+    try:
+        src.driver_connection.backup(dst.driver_connection)
+    finally:
+        dst.close(); src.close()
+    replica.dispose()
@@ -0,0 +1,40 @@
+"""Side effects of a citizen report, run off the request by services/tasks.py.
+
+public.report records the report and its photos, then queues these keyed on
+the PotholeReport id, so a report queues each at most once. Each handler
+also checks its own effect, which makes a re-run harmless.
+"""
+import os
+from flask import current_app
+from extensions import db
+from models import PotholeReport
+from services import thumbnails
+from services.tasks import enqueue, task
+from services.wallet import credit_reward
+
+@task("credit_reward")
+def credit_report_reward(report_id):
+    """Pay the reward for a unique report, once."""
+    report = db.session.get(PotholeReport, report_id)
+    if report is None or report.is_duplicate or report.reward_granted:
+        return
+    credit_reward(report.reporter_id, report.id)
+    report.reward_granted = True
+
+@task("photo_derivatives")
+def photo_derivatives(filenames):
+    """Build thumbnails for a report's new photos; existing ones are skipped."""
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    # the report moves its files into storage just after committing, so this can run first; retry then
+    missing = [n for n in filenames if not os.path.exists(os.path.join(upload_dir, n))]
+    if missing:
+        raise FileNotFoundError(f"not stored yet: {', '.join(missing)}")
+    for name in filenames:
+        thumbnails.generate(upload_dir, name)
+
+def enqueue_followups(report, filenames):
+    """Queue the work for a just-flushed report that added the photos ``filenames``."""
+    if not report.is_duplicate:
+        enqueue("credit_reward", f"credit_reward:report:{report.id}", report_id=report.id)
+    if filenames:
+        enqueue("photo_derivatives", f"photo_derivatives:report:{report.id}", filenames=filenames)
@@ -0,0 +1,97 @@
+"""Order a crew's planned work orders into a short driving route.
+
+The route is an open path (crews don't return to a depot): nearest neighbour
+builds a first tour over a haversine distance matrix, then 2-opt reverses
+segments while that shortens the path. Each 2-opt step scores every
+candidate end point for a given start in one numpy expression, so a few
+hundred stops settle in well under a second. Stops without coordinates can't
+be placed and are listed after the route.
+"""
+import time
+import numpy as np
+from extensions import db
+from models import Pothole, WorkOrder
+from services.geo import haversine_many
+
+def distance_matrix(lats, lons):
+    lats = np.asarray(lats, dtype=float); lons = np.asarray(lons, dtype=float)
+    return haversine_many(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+
+def nearest_neighbour(D, start):
+    n = len(D)
+    tour = [start]
+    seen = np.zeros(n, dtype=bool); seen[start] = True
+    for _ in range(n - 1):
+        d = np.where(seen, np.inf, D[tour[-1]])
+        nxt = int(np.argmin(d))
+        tour.append(nxt); seen[nxt] = True
+    return np.array(tour, dtype=np.int64)
+
+def two_opt(D, tour, time_limit=0.5):
+    """Shorten an open path by segment reversals; returns the new tour.
+
+    Reversing tour[i:j+1] swaps edges (a,b),(c,d) for (a,c),(b,d) where
+    a=tour[i-1], b=tour[i], c=tour[j], d=tour[j+1]; the last stop has no
+    outgoing edge, so reversing a tail only changes one edge.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    if n < 4:
+        return tour
+    deadline = time.perf_counter() + time_limit
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:]                                  # candidate j = i+1 .. n-1
+            d = np.append(tour[i + 2:], -1)
+            after = D[a, c] + np.where(d >= 0, D[b, d], 0.0)
+            before = D[a, b] + np.where(d >= 0, D[c, d], 0.0)
+            gain = before - after
+            k = int(np.argmax(gain))
+            if gain[k] > 1e-6:
+                j = i + 1 + k
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+    return tour
+
+def sequence(lats, lons, start=None):
+    """Visiting order for the points (indices), leg lengths in metres, and total metres.
+
+    start is an optional (lat, lon) the crew sets off from; without one the
+    route begins at the stop farthest from the centre, i.e. at one end.
+    """
+    n = len(lats)
+    if n == 0:
+        return np.array([], dtype=np.int64), np.array([]), 0.0
+    lats = np.asarray(lats, dtype=float); lons = np.asarray(lons, dtype=float)
+    if start is not None:
+        lats = np.append(start[0], lats); lons = np.append(start[1], lons)
+    D = distance_matrix(lats, lons)
+    # 2-opt never moves tour[0], so a given start point stays first
+    first = 0 if start is not None else int(np.argmax(haversine_many(lats.mean(), lons.mean(), lats, lons)))
+    tour = two_opt(D, nearest_neighbour(D, first))
+    legs = D[tour[:-1], tour[1:]]
+    if start is not None:
+        return tour[1:] - 1, legs, float(legs.sum())
+    return tour, np.append(0.0, legs), float(legs.sum())
+
+def crew_route(crew_id, start=None, statuses=("planned",)):
+    """The crew's work orders in driving order, plus any that can't be placed."""
+    rows = db.session.execute(
+        db.select(WorkOrder.id, WorkOrder.status, Pothole.id.label("pothole_id"), Pothole.public_id,
+                  Pothole.street_address, Pothole.priority, Pothole.size_1_10,
+                  Pothole.latitude, Pothole.longitude)
+        .join(Pothole, Pothole.id == WorkOrder.pothole_id)
+        .where(WorkOrder.crew_id == crew_id, WorkOrder.status.in_(statuses))
+        .order_by(WorkOrder.id)).all()
+    located = [r for r in rows if r.latitude is not None and r.longitude is not None]
+    order, legs, total = sequence([r.latitude for r in located], [r.longitude for r in located], start)
+    as_stop = lambda r: {"work_order_id": r.id, "status": r.status, "pothole_id": r.pothole_id,
+                         "public_id": r.public_id, "street_address": r.street_address,
+                         "priority": r.priority, "size_1_10": r.size_1_10,
+                         "latitude": r.latitude, "longitude": r.longitude}
+    stops = [dict(as_stop(located[i]), leg_m=round(float(leg), 1)) for i, leg in zip(order, legs)]
+    unrouted = [as_stop(r) for r in rows if r.latitude is None or r.longitude is None]
+    return {"crew_id": crew_id, "stops": stops, "unrouted": unrouted, "total_m": round(total, 1)}
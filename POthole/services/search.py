@@ -0,0 +1,96 @@
+"""Indexed pothole address search.
+
+SQLite: an external-content FTS5 table (trigram tokenizer) over
+street_address/address_norm, kept current by triggers and ranked by bm25.
+Postgres: pg_trgm GIN indexes, so the ILIKE below is index-backed, ranked
+by similarity(). Terms under 3 characters can't use trigrams and fall back
+to a plain ILIKE. Either way matching stays a case-insensitive substring
+match, same as the old filter.
+"""
+from sqlalchemy import event, func, select, text, Float, Integer
+from extensions import db
+from models import Pothole
+
+MIN_TERM = 3
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pothole_fts USING fts5(
+           street_address, address_norm, content='pothole', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_ai AFTER INSERT ON pothole BEGIN
+           INSERT INTO pothole_fts(rowid, street_address, address_norm)
+           VALUES (new.id, new.street_address, new.address_norm);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_ad AFTER DELETE ON pothole BEGIN
+           INSERT INTO pothole_fts(pothole_fts, rowid, street_address, address_norm)
+           VALUES ('delete', old.id, old.street_address, old.address_norm);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS pothole_fts_au AFTER UPDATE OF street_address, address_norm ON pothole BEGIN
+           INSERT INTO pothole_fts(pothole_fts, rowid, street_address, address_norm)
+           VALUES ('delete', old.id, old.street_address, old.address_norm);
+           INSERT INTO pothole_fts(rowid, street_address, address_norm)
+           VALUES (new.id, new.street_address, new.address_norm);
+       END""",
+    "INSERT INTO pothole_fts(pothole_fts) VALUES ('rebuild')",
+]
+_SQLITE_DROP = ["DROP TRIGGER IF EXISTS pothole_fts_ai", "DROP TRIGGER IF EXISTS pothole_fts_ad",
+                "DROP TRIGGER IF EXISTS pothole_fts_au", "DROP TABLE IF EXISTS pothole_fts"]
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_pothole_street_address_trgm ON pothole USING gin (street_address gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_pothole_address_norm_trgm ON pothole USING gin (address_norm gin_trgm_ops)",
+]
+_PG_DROP = ["DROP INDEX IF EXISTS ix_pothole_street_address_trgm",
+            "DROP INDEX IF EXISTS ix_pothole_address_norm_trgm"]
+
+def install_search_index(bind):
+    """Create (or rebuild) the search index for bind's dialect."""
+    ddl = {"sqlite": _SQLITE_DDL, "postgresql": _PG_DDL}.get(bind.dialect.name, [])
+    for stmt in ddl:
+        bind.execute(text(stmt))
+
+def drop_search_index(bind):
+    for stmt in {"sqlite": _SQLITE_DROP, "postgresql": _PG_DROP}.get(bind.dialect.name, []):
+        bind.execute(text(stmt))
+
+@event.listens_for(Pothole.__table__, "after_create")
+def _install_on_create(table, connection, **kw):
+    install_search_index(connection)
+
+def _ilike(q):
+    pattern = f"%{q}%"
+    return Pothole.street_address.ilike(pattern) | Pothole.address_norm.ilike(pattern)
+
+def _fts_matches(q):
+    # one quoted FTS5 phrase: a trigram phrase is a substring match
+    phrase = '"' + q.replace('"', '""') + '"'
+    return (text("SELECT rowid AS id, rank FROM pothole_fts WHERE pothole_fts MATCH :phrase")
+            .bindparams(phrase=phrase).columns(id=Integer, rank=Float).subquery("fts"))
+
+def _dialect():
+    return db.session.get_bind(mapper=Pothole).dialect.name
+
+def filter_potholes(query, q):
+    """Restrict a Pothole query to address matches, leaving its ordering alone."""
+    q = (q or "").strip()
+    if not q:
+        return query
+    dialect = _dialect()
+    if len(q) >= MIN_TERM and dialect == "sqlite":
+        return query.filter(Pothole.id.in_(select(_fts_matches(q).c.id)))
+    return query.filter(_ilike(q))
+
+def search_potholes(q, limit=20):
+    """Best address matches for q, most relevant first."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    dialect = _dialect()
+    if len(q) >= MIN_TERM and dialect == "sqlite":
+        fts = _fts_matches(q)
+        return (Pothole.query.join(fts, fts.c.id == Pothole.id)
+                .order_by(fts.c.rank, Pothole.id.desc()).limit(limit).all())
+    query = Pothole.query.filter(_ilike(q))
+    if len(q) >= MIN_TERM and dialect == "postgresql":
+        query = query.order_by(func.greatest(func.similarity(Pothole.street_address, q),
+                                             func.similarity(Pothole.address_norm, q)).desc())
+    return query.order_by(Pothole.created_at.desc()).limit(limit).all()
@@ -0,0 +1,50 @@
+"""Content-addressed storage for uploaded photos.
+
+Uploads are streamed to a temp file in fixed-size chunks and hashed on the
+way through, so memory use doesn't depend on the upload size. The final
+name is derived from the SHA-1 (``ab/abcdef….jpg``), so identical photos are
+kept once on disk no matter how many reports reference them.
+
+Callers keep() a spooled file only after the row that references it has
+committed, and discard() it if the transaction fails, so a failed request
+leaves nothing behind in storage.
+"""
+import hashlib, os, tempfile
+
+CHUNK_SIZE = 64 * 1024
+_EXT_ALIASES = {"jpeg": "jpg"}
+
+def spool(stream, upload_dir):
+    """Copy stream into a temp file under upload_dir; returns (sha1 hex, temp path)."""
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha1()
+    fd, tmp = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        discard(tmp)
+        raise
+    return digest.hexdigest(), tmp
+
+def stored_name(file_hash, ext):
+    ext = ext.lower()
+    return f"{file_hash[:2]}/{file_hash}.{_EXT_ALIASES.get(ext, ext)}"
+
+def keep(tmp, upload_dir, name):
+    """Move a spooled file to its content address; drops it if that content is already stored."""
+    dest = os.path.join(upload_dir, name)
+    if os.path.exists(dest):
+        discard(tmp)
+        return False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    os.replace(tmp, dest)
+    return True
+
+def discard(tmp):
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
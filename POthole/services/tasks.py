@@ -0,0 +1,180 @@
+"""A small database-backed task queue for work that needn't hold up a request.
+
+enqueue() adds a Task row in the caller's transaction, so work is queued if
+and only if the request's own changes commit. Every task has a unique key
+(e.g. "credit_reward:report:42"): enqueueing a key that already exists does
+nothing, and handlers check their own effect before repeating it, so a task
+that runs twice changes nothing the second time.
+
+``flask tasks work`` claims due tasks one at a time with a conditional
+UPDATE, so several workers can share the table. While a handler runs, a
+heartbeat thread renews the task's lease every TASK_LEASE_S / 3 seconds; a
+task whose worker died stops being renewed and is claimed again once its
+TASK_LEASE_S lease runs out (or marked failed, if that was its last
+attempt). A handler runs in the
+worker's session and does not commit; its changes commit together with the
+task being marked done. On an exception everything rolls back and the task
+is retried after TASK_RETRY_BASE_S * 2**(attempts - 1) seconds, up to
+max_attempts, after which it stays "failed" until ``flask tasks retry``.
+
+With TASKS_EAGER=1 (development) kick() runs due tasks right after the
+request that queued them commits.
+"""
+import os, socket, threading, time, traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from importlib import import_module
+from flask import current_app
+from sqlalchemy import and_
+from extensions import db
+from models import Task
+
+# modules whose @task handlers the worker needs
+HANDLER_MODULES = ("services.report_tasks",)
+HANDLERS = {}
+CLAIM_RETRIES = 5   # tries per pass when another worker takes the row we picked
+
+def task(name, max_attempts=None):
+    """Register fn(**payload) as the handler for tasks called name."""
+    def register(fn):
+        HANDLERS[name] = (fn, max_attempts)
+        return fn
+    return register
+
+def _load_handlers():
+    for module in HANDLER_MODULES:
+        import_module(module)
+
+def enqueue(name, key, delay=0, **payload):
+    """Queue a task in the caller's transaction; returns it, or None if key is already queued."""
+    _load_handlers()
+    if name not in HANDLERS:
+        raise KeyError(f"unknown task {name!r}")
+    if db.session.scalar(db.select(Task.id).where(Task.key == key)) is not None:
+        return None
+    max_attempts = HANDLERS[name][1] or current_app.config.get("TASK_MAX_ATTEMPTS", 5)
+    t = Task(name=name, key=key, payload=payload, max_attempts=max_attempts,
+             run_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(t)
+    return t
+
+def claim(worker):
+    """Mark the next due task running for this worker and commit; returns its id or None."""
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config.get("TASK_LEASE_S", 300))
+    expired = and_(Task.status == "running", Task.locked_at < now - lease)
+    # a dead worker's task that has used up its attempts is not run again
+    db.session.execute(
+        db.update(Task).where(expired, Task.attempts >= Task.max_attempts)
+        .values(status="failed", locked_by=None, last_error="lease expired: worker stopped during the last attempt")
+        .execution_options(synchronize_session=False))
+    # queued and due, oldest first; then anything whose worker stopped renewing its lease
+    for due, order in ((and_(Task.status == "queued", Task.run_at <= now), Task.run_at),
+                       (and_(expired, Task.attempts < Task.max_attempts), Task.locked_at)):
+        # SKIP LOCKED (Postgres, MySQL) sends concurrent workers to different rows; SQLite
+        # serializes writers and leaves the clause out
+        nxt = (db.select(Task.id).where(due).order_by(order, Task.id).limit(1)
+               .with_for_update(skip_locked=True).scalar_subquery())
+        for _ in range(CLAIM_RETRIES):
+            tid = db.session.execute(
+                db.update(Task).where(Task.id == nxt, due)
+                .values(status="running", locked_by=worker, locked_at=now, attempts=Task.attempts + 1)
+                .returning(Task.id).execution_options(synchronize_session=False)).scalar()
+            db.session.commit()
+            if tid is not None:
+                return tid
+            # nothing claimed: try again only if another worker took our row and more is due
+            if db.session.scalar(db.select(Task.id).where(due).limit(1)) is None:
+                break
+    return None
+
+@contextmanager
+def _heartbeat(tid, worker):
+    """Keep renewing the lease on a claimed task until the block exits."""
+    app = current_app._get_current_object()
+    every = app.config.get("TASK_LEASE_S", 300) / 3
+    stop = threading.Event()
+
+    def beat():
+        with app.app_context():
+            while not stop.wait(every):
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(db.update(Task.__table__)
+                                     .where(Task.id == tid, Task.status == "running", Task.locked_by == worker)
+                                     .values(locked_at=datetime.utcnow()))
+                except Exception as e:          # e.g. the handler's transaction holds the SQLite write lock
+                    app.logger.warning("task %s: lease renewal failed: %s", tid, e)
+
+    thread = threading.Thread(target=beat, name=f"task-{tid}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_one(worker):
+    """Claim and run one task; returns it, or None when nothing is due."""
+    _load_handlers()
+    tid = claim(worker)
+    if tid is None:
+        return None
+    t = db.session.get(Task, tid)
+    try:
+        if t.name not in HANDLERS:
+            raise LookupError(f"no handler for task {t.name!r}")
+        with _heartbeat(tid, worker):
+            HANDLERS[t.name][0](**t.payload)
+        t.status, t.locked_by, t.last_error = "done", None, None
+        db.session.commit()
+    except Exception:
+        error = traceback.format_exc(limit=8)[-4000:]
+        db.session.rollback()
+        t = db.session.get(Task, tid)
+        base = current_app.config.get("TASK_RETRY_BASE_S", 30)
+        if t.attempts >= t.max_attempts:
+            t.status = "failed"
+        else:
+            t.status, t.run_at = "queued", datetime.utcnow() + timedelta(seconds=base * 2 ** (t.attempts - 1))
+        t.locked_by, t.last_error = None, error
+        db.session.commit()
+        current_app.logger.warning("task %s (%s) failed, attempt %d/%d: %s",
+                                   t.key, t.name, t.attempts, t.max_attempts, error.strip().splitlines()[-1])
+    return t
+
+def work(once=False, idle_sleep=1.0, max_tasks=None, worker=None):
+    """Run tasks until stopped (or, with once=True, until nothing is due); returns how many ran."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    n = 0
+    while max_tasks is None or n < max_tasks:
+        if run_one(worker) is None:
+            if once:
+                break
+            time.sleep(idle_sleep)
+            continue
+        n += 1
+    return n
+
+def kick():
+    """Run due tasks inline when TASKS_EAGER is set; otherwise the worker picks them up."""
+    if current_app.config.get("TASKS_EAGER"):
+        work(once=True, worker="eager")
+
+def counts():
+    """{(name, status): n} over the whole table."""
+    return {(name, status): n for name, status, n in db.session.execute(
+        db.select(Task.name, Task.status, db.func.count()).group_by(Task.name, Task.status))}
+
+def retry_failed(name=None):
+    """Put failed tasks back in the queue with a fresh set of attempts (caller commits)."""
+    q = db.update(Task).where(Task.status == "failed")
+    if name:
+        q = q.where(Task.name == name)
+    return db.session.execute(q.values(status="queued", attempts=0, run_at=datetime.utcnow())
+                              .execution_options(synchronize_session=False)).rowcount
+
+def prune(older_than):
+    """Delete done tasks last updated before older_than (caller commits)."""
+    return db.session.execute(db.delete(Task).where(Task.status == "done", Task.updated_at < older_than)
+                              .execution_options(synchronize_session=False)).rowcount
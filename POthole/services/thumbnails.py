@@ -0,0 +1,35 @@
+"""Resized derivatives of uploaded photos, built off the request.
+
+Each stored upload ``ab/<sha1>.<ext>`` gets ``derived/<size>/ab/<sha1>.jpg``
+for every entry in DERIVATIVES. A report queues the work as a
+"photo_derivatives" task (services/report_tasks.py); until a derivative
+exists, photo_url() falls back to the original.
+"""
+import os
+
+DERIVATIVES = {"thumb": (160, 160), "web": (1280, 1280)}
+JPEG_QUALITY = 80
+
+def derivative_name(filename, size):
+    return f"derived/{size}/{os.path.splitext(filename)[0]}.jpg"
+
+def derivative_ready(upload_dir, filename, size):
+    return os.path.exists(os.path.join(upload_dir, derivative_name(filename, size)))
+
+def generate(upload_dir, filename):
+    """Write any missing derivatives of one stored upload."""
+    from PIL import Image, ImageOps
+    src = os.path.join(upload_dir, filename)
+    todo = [s for s in DERIVATIVES if not derivative_ready(upload_dir, filename, s)]
+    if not todo or not os.path.exists(src):
+        return
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        for size in todo:
+            out = im.copy()
+            out.thumbnail(DERIVATIVES[size])
+            dest = os.path.join(upload_dir, derivative_name(filename, size))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp = dest + ".part"
+            out.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp, dest)
@@ -0,0 +1,119 @@
+"""Bounded LRU/TTL cache of who a logged-in user is, for the login manager.
+
+Flask-Login reloads the user on every authenticated request, and the
+blueprint guards only look at id and role. ``load()`` keeps the identity
+columns (SNAPSHOT) per user id and hands back a User attached to the current
+session with ``merge(load=False)``, so a cached request issues no query for
+the user at all. The other columns (password hash, wallet balance,
+timestamps) are left unloaded and are fetched on first access, which keeps
+the hash out of the cache and the balance exact.
+
+A commit that changes a User row through the ORM (role changes, new crew
+leads, promotion to staff) drops that user's entry. Bulk UPDATE statements
+don't say which rows they touched, so only the ones that can change a
+snapshot column drop entries, and those drop them all. Each worker has its
+own copy; USER_CACHE_TTL bounds how long another worker's change can go
+unseen. USER_CACHE_SIZE=0 turns the cache off.
+"""
+import threading, time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+SNAPSHOT = ("id", "name", "email", "phone", "role")
+
+class UserCache:
+    def __init__(self, app=None):
+        self.size = 10_000
+        self.ttl = 60
+        self._data = OrderedDict()        # user id -> (expires, snapshot)
+        self._lock = threading.Lock()
+        self._listening = False
+        self.hits = self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.size = app.config.get("USER_CACHE_SIZE", 10_000)
+        self.ttl = app.config.get("USER_CACHE_TTL", 60)
+        self.clear()
+        if not self._listening:
+            event.listen(Session, "after_flush", self._collect_flush)
+            event.listen(Session, "do_orm_execute", self._collect_bulk)
+            event.listen(Session, "after_commit", self._flush_pending)
+            event.listen(Session, "after_rollback", self._drop_pending)
+            self._listening = True
+
+    def load(self, user_id):
+        """The User with this id, attached to the session, or None."""
+        from extensions import db
+        from models import User
+        snap = self._get(user_id)
+        if snap is not None:
+            self.hits += 1
+            user = User(**snap)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+        self.misses += 1
+        user = db.session.get(User, user_id)
+        if user is not None and self.size:
+            self._put(user_id, {c: getattr(user, c) for c in SNAPSHOT})
+        return user
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for uid in user_ids:
+                self._data.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _get(self, user_id):
+        with self._lock:
+            hit = self._data.get(user_id)
+            if hit is None:
+                return None
+            if hit[0] < time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return hit[1]
+
+    def _put(self, user_id, snap):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, snap)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    # --- session hooks ---
+    def _pending(self, session):
+        return session.info.setdefault("user_cache_invalidate", set())
+
+    def _collect_flush(self, session, flush_context):
+        from models import User
+        ids = {o.id for o in (*session.dirty, *session.deleted) if isinstance(o, User)}
+        if ids:
+            self._pending(session).update(ids)
+
+    def _collect_bulk(self, state):
+        from models import User
+        if not ((state.is_update or state.is_delete) and state.bind_mapper is not None
+                and state.bind_mapper.class_ is User):
+            return
+        if state.is_update:
+            params = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+            touched = set(getattr(state.statement, "_values", None) or ()) | {k for p in params for k in p}
+            touched = {getattr(k, "key", k) for k in touched}
+            if not touched & set(SNAPSHOT[1:]):
+                return
+        self._pending(state.session).add(None)
+
+    def _flush_pending(self, session):
+        ids = session.info.pop("user_cache_invalidate", None)
+        if ids:
+            self.clear() if None in ids else self.invalidate(*ids)
+
+    def _drop_pending(self, session):
+        session.info.pop("user_cache_invalidate", None)
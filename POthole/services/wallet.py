@@ -1,6 +1,36 @@
 ﻿from extensions import db
-from models import WalletTransaction
+from sqlalchemy import func, case
+from models import User, WalletTransaction
 
 def credit_reward(user_id: int, report_id: int, amount: float = 20.0, description: str = "Unique pothole report reward"):
     tx = WalletTransaction(user_id=user_id, amount=amount, type="credit", description=description, ref_report_id=report_id)
-    db.session.add(tx)
+    db.session.add(tx)
+    _adjust_balance(user_id, amount)
+
+def _adjust_balance(user_id: int, delta: float):
+    # relative UPDATE in the caller's transaction: commits or rolls back with the ledger row
+    db.session.execute(db.update(User).where(User.id == user_id)
+                       .values(wallet_balance_cached=User.wallet_balance_cached + delta))
+
+def ledger_totals():
+    """Signed ledger sum per user id, from one grouped query."""
+    signed = case((WalletTransaction.type == "credit", WalletTransaction.amount), else_=-WalletTransaction.amount)
+    rows = (db.session.query(WalletTransaction.user_id, func.sum(signed))
+            .group_by(WalletTransaction.user_id).all())
+    return {uid: float(total or 0) for uid, total in rows}
+
+def reconcile_balances(fix: bool = False, tolerance: float = 0.005):
+    """Compare cached balances with the ledger; returns the drifted users.
+
+    Each entry is (user_id, cached, ledger). With fix=True the cached column
+    is reset to the ledger value for those users (caller commits).
+    """
+    totals = ledger_totals()
+    drift = []
+    for uid, cached in db.session.query(User.id, User.wallet_balance_cached):
+        ledger = totals.get(uid, 0.0)
+        if abs((cached or 0) - ledger) > tolerance:
+            drift.append((uid, float(cached or 0), ledger))
+    if fix and drift:
+        db.session.execute(db.update(User), [{"id": uid, "wallet_balance_cached": ledger} for uid, _, ledger in drift])
+    return drift